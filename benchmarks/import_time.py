@@ -0,0 +1,69 @@
+# Measures the cold-start import time of dic via -X importtime, failing if any import goes over its budget, e.g.
+#   python benchmarks/import_time.py
+#   python benchmarks/import_time.py --runs 20 --budget dic.container=15
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# module -> budget in milliseconds, for the import including everything it imports (beyond interpreter startup)
+BUDGETS = {
+    'dic': 5,
+    'dic.container': 25,
+    'dic.plan': 25,
+}
+
+
+def import_time(module, pycache):
+    """
+    :return: The cumulative import time of the module in milliseconds, with its bytecode already compiled.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-X', 'pycache_prefix=' + pycache, '-c', 'import ' + module],
+        env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+
+    # lines are "import time: self [us] | cumulative | imported package", nested imports being indented
+    total = 0
+    for line in output.splitlines():
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  ') and name.strip().split('.')[0] == 'dic':
+            total += int(cumulative)
+    return total / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget', action='append', default=[], metavar='MODULE=MS',
+                        help='override the budget of a module')
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    for budget in args.budget:
+        module, ms = budget.split('=')
+        budgets[module] = float(ms)
+
+    over = []
+    with tempfile.TemporaryDirectory() as pycache:
+        for (module, budget) in sorted(budgets.items()):
+            # the first run compiles the bytecode, which a deployed package will already have
+            import_time(module, pycache)
+            median = statistics.median(import_time(module, pycache) for i in range(args.runs))
+            print('%-16s %7.2fms (budget %gms)' % (module, median, budget))
+            if median > budget:
+                over.append(module)
+
+    if over:
+        print('Over budget: %s' % ', '.join(over))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Measures resolve throughput across threads, to compare GIL and free-threaded (no-GIL) interpreters, e.g.
+#   python benchmarks/resolve_threads.py
+#   python3.13t benchmarks/resolve_threads.py
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import dic
+
+
+class Config(object):
+    pass
+
+
+class Repository(object):
+    def __init__(self, config: Config):
+        self.config = config
+
+
+class Service(object):
+    def __init__(self, repository: Repository, config: Config):
+        self.repository = repository
+        self.config = config
+
+
+def build_container():
+    builder = dic.container.ContainerBuilder()
+    builder.register_class(Config, component_scope=dic.scope.SingleInstance)
+    builder.register_class(Repository)
+    builder.register_class(Service)
+    return builder.build()
+
+
+def measure(container, component_type, threads, resolves):
+    """
+    Resolves the component type on each thread, returning the resolves per second across all threads.
+    """
+    start_barrier = threading.Barrier(threads + 1)
+
+    def run():
+        start_barrier.wait()
+        for _ in range(resolves):
+            container.resolve(component_type)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+
+    start_barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return threads * resolves / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures resolve throughput across threads.')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--resolves', type=int, default=50000, help='resolves per thread')
+    args = parser.parse_args()
+
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('%s, GIL %s, %d CPUs' % (sys.version.split()[0], 'enabled' if gil_enabled else 'disabled', os.cpu_count()))
+
+    container = build_container()
+    for (name, component_type) in (('singleton', Config), ('per-dependency graph', Service)):
+        baseline = None
+        for threads in args.threads:
+            throughput = measure(container, component_type, threads, args.resolves)
+            baseline = baseline or throughput
+            print('%-22s %2d threads: %10.0f resolves/s (%.2fx)' % (name, threads, throughput, throughput / baseline))
+
+
+if __name__ == '__main__':
+    main()
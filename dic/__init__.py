@@ -1,3 +1,17 @@
 __version__ = '1.5.2b1'
 
-from . import container, rel, scope
\ No newline at end of file
+import importlib
+
+# submodules are imported when first used (e.g. dic.container), so importing dic alone costs next to nothing for
+# short-lived processes
+_submodules = ('analyze', 'codegen', 'container', 'plan', 'rel', 'scope', 'tenant', 'trace')
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_submodules))
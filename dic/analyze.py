@@ -0,0 +1,277 @@
+"""
+Analyzes the dependency graph of a container builder offline, e.g. before it ships.
+
+Usage: python -m dic.analyze package.module:builder_or_module [--format text|json|dot] [--top N]
+"""
+import argparse
+import importlib
+import json
+import sys
+from . import container
+from . import rel
+from . import scope
+
+
+def _name(component_type):
+    if container._is_keyed(component_type):
+        return '%s[%r]' % (_name(component_type[0]), component_type[1])
+    if isinstance(component_type, type):
+        return '%s.%s' % (component_type.__module__, component_type.__qualname__)
+    return repr(component_type)
+
+
+def _scope_name(component_scope):
+    """
+    :param component_scope: A scope, or a type of scope.
+    :return: The name of the type of the scope, including the scope it wraps if any, e.g. Limited(SingleInstance).
+    """
+    if isinstance(component_scope, type):
+        return component_scope.__name__
+    inner_scope = getattr(component_scope, 'scope', None)
+    if isinstance(inner_scope, scope.Scope):
+        return '%s(%s)' % (type(component_scope).__name__, _scope_name(inner_scope))
+    return type(component_scope).__name__
+
+
+class _Node(object):
+    """
+    A registered type, and the types it depends on.
+    """
+    def __init__(self, component_type, kind, scope_name, dependencies):
+        self.component_type = component_type
+        self.kind = kind
+        self.scope_name = scope_name
+        # list of (argument name, type, relationship name or None)
+        self.dependencies = dependencies
+
+    @property
+    def eager_dependencies(self):
+        """
+        The types created along with this one, i.e. not via a relationship such as a Factory or Lazy.
+        """
+        return [dependency for (arg_name, dependency, relationship) in self.dependencies if relationship is None]
+
+
+class DependencyGraph(object):
+    """
+    The dependency graph of the components registered with a container builder, built from the argument types of
+    each registration.
+    """
+    def __init__(self, registry, generic_registry=None):
+        """
+        :param registry: Map of type -> registration, e.g. ContainerBuilder.registry.
+        :param generic_registry: Map of generic type -> open generic registration.
+        """
+        self.nodes = {}
+        for (component_type, registration) in registry.items():
+            self.nodes[component_type] = _Node(
+                component_type, type(registration).__name__.strip('_').replace('Registration', '').lower(),
+                'Instance' if isinstance(registration, container._InstanceRegistration) else
+                _scope_name(registration.component_scope),
+                [dependency for (arg_name, arg_type) in registration.argument_types.items()
+                 for dependency in self._dependencies(arg_name, arg_type, registry)])
+
+        for (component_type, registration) in (generic_registry or {}).items():
+            self.nodes[component_type] = _Node(component_type, 'generic', _scope_name(registration.scope_type), [])
+
+        # types depended on, but not registered
+        self.missing = sorted({
+            _name(dependency) for node in self.nodes.values() for (arg_name, dependency, relationship) in
+            node.dependencies if dependency not in self.nodes}, key=str)
+
+        # type -> (depth, instances per resolve), calculated when first needed
+        self._measures = {}
+        self.cycles = []
+
+    @staticmethod
+    def _dependencies(arg_name, arg_type, registry):
+        if isinstance(arg_type, rel.Index):
+            # depends on each of the keyed registrations of the type
+            return [('%s[%r]' % (arg_name, key[1]), key, 'Index') for key in registry
+                    if container._is_keyed(key) and key[0] is arg_type.component_type]
+        if isinstance(arg_type, rel.Relationship):
+            return [(arg_name, getattr(arg_type, 'component_type', None), type(arg_type).__name__)]
+        return [(arg_name, arg_type, None)]
+
+    @staticmethod
+    def from_builder(builder):
+        """
+        :param builder: The container builder to analyze.
+        :return: The dependency graph of the builder.
+        """
+        return DependencyGraph(builder.registry, builder.generic_registry)
+
+    def _measure(self, component_type, visiting=()):
+        """
+        Measures the longest chain of eager dependencies from the given type, and the number of instances created
+        by a resolve of it (assuming any singletons already exist).
+        :return: Tuple of (depth, instances per resolve)
+        """
+        measure = self._measures.get(component_type)
+        if measure is not None:
+            return measure
+
+        node = self.nodes.get(component_type)
+        if node is None:
+            return 0, 0
+
+        if component_type in visiting:
+            self.cycles.append([_name(t) for t in visiting[visiting.index(component_type):]] + [_name(component_type)])
+            return 0, 0
+
+        depth = 0
+        instances = 0
+        for dependency in node.eager_dependencies:
+            dependency_depth, dependency_instances = self._measure(dependency, visiting + (component_type,))
+            depth = max(depth, dependency_depth)
+            instances += dependency_instances
+
+        # e.g. Limited(InstancePerDependency) too
+        per_dependency = scope.InstancePerDependency.__name__
+        if node.scope_name == per_dependency or node.scope_name.endswith('(%s)' % per_dependency):
+            measure = (depth + 1, instances + 1)
+        else:
+            # already exists, so nothing is created for it (or for its dependencies)
+            measure = (depth + 1, 0)
+        self._measures[component_type] = measure
+        return measure
+
+    def stats(self, top=10):
+        """
+        :param top: The number of types to list for hot spots.
+        :return: Statistics of the graph as structured data.
+        """
+        for component_type in self.nodes:
+            self._measure(component_type)
+
+        scopes = {}
+        for node in self.nodes.values():
+            scopes[node.scope_name] = scopes.get(node.scope_name, 0) + 1
+
+        def ranked(value):
+            values = sorted(((value(t), _name(t)) for t in self.nodes), key=lambda v: (-v[0], v[1]))
+            return [{'type': name, 'count': count} for (count, name) in values[:top] if count]
+
+        return {
+            'nodes': len(self.nodes),
+            'edges': sum(len(node.dependencies) for node in self.nodes.values()),
+            'max_depth': max((depth for (depth, instances) in self._measures.values()), default=0),
+            'scopes': scopes,
+            'fan_out': ranked(lambda t: len(self.nodes[t].dependencies)),
+            'fan_in': ranked(lambda t: sum(
+                1 for node in self.nodes.values() for (a, dependency, r) in node.dependencies if dependency == t)),
+            'instances_per_resolve': ranked(lambda t: self._measures[t][1]),
+            'missing': self.missing,
+            'cycles': self.cycles,
+        }
+
+    def to_json(self, top=10):
+        """
+        :return: The graph and its statistics as a JSON document.
+        """
+        return json.dumps({
+            'stats': self.stats(top),
+            'nodes': [{
+                'type': _name(node.component_type),
+                'kind': node.kind,
+                'scope': node.scope_name,
+                'dependencies': [{
+                    'argument': arg_name,
+                    'type': _name(dependency),
+                    'relationship': relationship,
+                } for (arg_name, dependency, relationship) in node.dependencies],
+            } for node in self.nodes.values()],
+        }, indent=2)
+
+    def to_dot(self):
+        """
+        :return: The graph in the Graphviz DOT format. Dependencies via relationships are dashed.
+        """
+        lines = ['digraph dic {']
+        for node in self.nodes.values():
+            lines.append('    %s [label="%s\\n%s"];' % (
+                json.dumps(_name(node.component_type)), _name(node.component_type), node.scope_name))
+            for (arg_name, dependency, relationship) in node.dependencies:
+                style = '' if relationship is None else ', style=dashed'
+                lines.append('    %s -> %s [label="%s"%s];' % (
+                    json.dumps(_name(node.component_type)), json.dumps(_name(dependency)),
+                    arg_name if relationship is None else '%s (%s)' % (arg_name, relationship), style))
+        lines.append('}')
+        return '\n'.join(lines)
+
+    def to_text(self, top=10):
+        """
+        :return: A human readable report of the statistics of the graph.
+        """
+        stats = self.stats(top)
+        lines = [
+            'Nodes: %d' % stats['nodes'],
+            'Edges: %d' % stats['edges'],
+            'Max depth: %d' % stats['max_depth'],
+            'Scopes: %s' % ', '.join('%s=%d' % scope_count for scope_count in sorted(stats['scopes'].items())),
+        ]
+        for (title, key) in (
+                ('Fan-out hot spots', 'fan_out'), ('Fan-in hot spots', 'fan_in'),
+                ('Instances created per resolve', 'instances_per_resolve')):
+            lines.append('%s:' % title)
+            lines.extend('    %5d  %s' % (entry['count'], entry['type']) for entry in stats[key])
+        if stats['missing']:
+            lines.append('Missing registrations:')
+            lines.extend('    %s' % missing for missing in stats['missing'])
+        if stats['cycles']:
+            lines.append('Circular dependencies:')
+            lines.extend('    %s' % ' -> '.join(cycle) for cycle in stats['cycles'])
+        return '\n'.join(lines)
+
+
+def load(target):
+    """
+    Loads a container builder from the given target.
+    :param target: 'package.module:name', where name is a ContainerBuilder, a Module (or Module class), or a function
+    returning either.
+    :return: The container builder.
+    """
+    module_name, _, attribute = target.partition(':')
+    obj = importlib.import_module(module_name)
+    for name in filter(None, attribute.split('.')):
+        obj = getattr(obj, name)
+
+    if isinstance(obj, type) and issubclass(obj, container.Module):
+        obj = obj()
+    elif callable(obj) and not isinstance(obj, (container.ContainerBuilder, container.Module)):
+        obj = obj()
+
+    if isinstance(obj, container.Module):
+        builder = container.ContainerBuilder()
+        builder.register_module(obj)
+        return builder
+
+    if isinstance(obj, container.ContainerBuilder):
+        return obj
+
+    raise TypeError("%s is not a ContainerBuilder or Module." % target)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m dic.analyze', description='Analyzes the dependency graph of a container builder.')
+    parser.add_argument('target', help='package.module:name of a ContainerBuilder or Module')
+    parser.add_argument('--format', choices=('text', 'json', 'dot'), default='text')
+    parser.add_argument('--top', type=int, default=10, help='the number of types to list for hot spots')
+    args = parser.parse_args(argv)
+
+    # the target is usually in the current directory, as when running a script
+    if '' not in sys.path:
+        sys.path.insert(0, '')
+
+    graph = DependencyGraph.from_builder(load(args.target))
+    if args.format == 'json':
+        print(graph.to_json(args.top))
+    elif args.format == 'dot':
+        print(graph.to_dot())
+    else:
+        print(graph.to_text(args.top))
+
+
+if __name__ == '__main__':
+    main()
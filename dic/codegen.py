@@ -0,0 +1,380 @@
+"""
+Generates a standalone Python module wiring the components of a container by hand, for zero container overhead.
+
+Usage: python -m dic.codegen package.module:builder_or_module [--output wiring.py] [--check generated.module]
+"""
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import re
+import sys
+from . import container
+from . import plan
+from . import rel
+from . import scope
+
+
+class CodegenError(Exception):
+    pass
+
+
+def _name(value):
+    if isinstance(value, type):
+        return '%s.%s' % (value.__module__, value.__qualname__)
+    if isinstance(value, rel.Relationship):
+        described = '%s(%s)' % (type(value).__name__, _name(getattr(value, 'component_type', None)))
+        return described + (' in_thread' if getattr(value, 'in_thread', False) else '')
+    if type(value) is tuple:
+        return '(%s)' % ', '.join(_name(item) for item in value)
+    return repr(value)
+
+
+def _callable_name(function):
+    return '%s.%s' % (function.__module__, function.__qualname__)
+
+
+def _identifier(key):
+    """
+    :return: A readable Python identifier for a registry key.
+    """
+    if isinstance(key, type):
+        text = key.__qualname__
+    elif type(key) is tuple:
+        text = '_'.join(_identifier(item) for item in key)
+    else:
+        text = str(key)
+    return re.sub(r'\W', '_', text)
+
+
+def _describe(registration, keys):
+    """
+    Describes a registration, for the fingerprint. Instances are described by type, as they aren't generated.
+    """
+    if isinstance(registration, container._InstanceRegistration):
+        kind, target = 'instance', _name(type(registration._instance))
+    elif isinstance(registration, container._CallbackRegistration):
+        kind, target = 'callback', _callable_name(registration._callback)
+    elif isinstance(registration, container._ConstructorRegistration):
+        kind, target = 'class', _name(registration.class_type)
+    else:
+        kind, target = type(registration).__name__, _name(getattr(registration, 'generic_type', None))
+
+    return {
+        'kind': kind,
+        'target': target,
+        'keys': sorted(_name(key) for key in keys),
+        'scope': type(getattr(registration, 'component_scope', None)).__name__,
+        'arguments': {arg_name: _name(arg_type) for (arg_name, arg_type) in registration.argument_types.items()}
+        if hasattr(registration, 'argument_types') else {},
+        'decorators': [_callable_name(decorator) for decorator in getattr(registration, 'decorators', ())],
+    }
+
+
+def _registrations(component_container):
+    """
+    :return: List of (registration, keys), keeping the keys of a registration available as multiple types together.
+    """
+    registrations = {}
+    for (key, registration) in component_container.registry_map.items():
+        # specializations are closed on demand, so aren't part of the registrations
+        if not isinstance(registration, container._ClosedGenericRegistration):
+            registrations.setdefault(id(registration), (registration, []))[1].append(key)
+    for (key, registration) in component_container.generic_map.items():
+        registrations.setdefault(id(registration), (registration, []))[1].append(key)
+    return list(registrations.values())
+
+
+def fingerprint(component_container):
+    """
+    Fingerprints the registrations of a container, to detect when a generated module is out of date.
+    :param component_container: The container.
+    :return: The fingerprint.
+    """
+    descriptions = sorted(json.dumps(_describe(registration, keys), sort_keys=True) for (registration, keys) in
+                          _registrations(component_container))
+    return hashlib.sha256('\n'.join(descriptions).encode('utf-8')).hexdigest()[:16]
+
+
+def check(generated, component_container):
+    """
+    Checks that a generated module still matches the registrations of a container.
+    :param generated: The generated module.
+    :param component_container: The container it was generated from.
+    :raises CodegenError: If the registrations have changed since the module was generated.
+    """
+    expected = fingerprint(component_container)
+    if getattr(generated, 'FINGERPRINT', None) != expected:
+        raise CodegenError("%s is out of date with the registrations of the container, generate it again." %
+                           generated.__name__)
+
+
+class _Generator(object):
+    def __init__(self, component_container):
+        self.container = component_container
+        self.imports = {'threading'}
+        # id(registration) -> name of its resolve function
+        self.resolvers = {}
+        # key -> name of its resolve function
+        self.keys = {}
+        self.names = set()
+
+    def reference(self, obj):
+        """
+        :return: An expression referencing the class or function by its qualified name.
+        """
+        try:
+            reference = plan._Reference(obj)
+        except plan.PlanError as error:
+            raise CodegenError(str(error))
+        self.imports.add(reference.module)
+        return '%s.%s' % (reference.module, reference.qualified_name)
+
+    def expression(self, value):
+        """
+        :return: An expression for a registry key or argument type.
+        """
+        if isinstance(value, type):
+            return self.reference(value)
+        if type(value) is tuple:
+            items = [self.expression(item) for item in value]
+            return '(%s,)' % items[0] if len(items) == 1 else '(%s)' % ', '.join(items)
+        if value is None or type(value) in (str, int, float, bool):
+            return repr(value)
+        raise CodegenError("%r can't be generated, only types and literals can be used as keys." % (value,))
+
+    def unique_name(self, key):
+        base = _identifier(key)
+        name = base
+        index = 2
+        while name in self.names:
+            name = '%s_%d' % (base, index)
+            index += 1
+        self.names.add(name)
+        return name
+
+    def argument(self, arg_type):
+        """
+        :return: An expression creating the argument.
+        """
+        if getattr(arg_type, 'timeout', None) is not None:
+            # the generated module doesn't enforce timeouts
+            raise CodegenError("%s relationships with a timeout can't be generated." % type(arg_type).__name__)
+        if isinstance(arg_type, rel.Factory):
+            # a factory is called like the resolve function, with overriding arguments
+            return self.resolver(arg_type.component_type)
+        if isinstance(arg_type, (rel.Lazy, rel.Proxy, rel.AsyncLazy)):
+            self.imports.add('dic.rel')
+            extra = ', in_thread=True' if getattr(arg_type, 'in_thread', False) else ''
+            return 'dic.rel.%s(%s%s).resolve(_container)' % (
+                type(arg_type).__name__, self.expression(arg_type.component_type), extra)
+        if isinstance(arg_type, rel.Relationship):
+            raise CodegenError("%s relationships can't be generated." % type(arg_type).__name__)
+        return '%s()' % self.resolver(arg_type)
+
+    def resolver(self, key):
+        """
+        :return: The name of the function resolving the key.
+        """
+        name = self.keys.get(key)
+        if name is None:
+            name = self.keys[key] = '_missing(%s)' % self.expression(key)
+        return name
+
+    def generate(self, source):
+        registrations = _registrations(self.container)
+        for (registration, keys) in registrations:
+            if isinstance(registration, (container._GenericRegistration, container._ClosedGenericRegistration)):
+                raise CodegenError("Generic registrations can't be generated.")
+            name = self.unique_name(keys[0])
+            self.resolvers[id(registration)] = name
+            for key in keys:
+                self.keys[key] = 'resolve_' + name
+
+        body = []
+        for (registration, keys) in registrations:
+            body.extend(self.component(registration, self.resolvers[id(registration)]))
+
+        header = [
+            '# Generated by dic.codegen%s, do not edit. Generate it again when the registrations change.' % (
+                ' from ' + source if source else ''),
+        ]
+        header.extend('import %s' % module for module in sorted(self.imports))
+        header.extend([
+            '',
+            'FINGERPRINT = %r' % fingerprint(self.container),
+            '',
+            '# type -> instance, for instances registered with the container',
+            '_instances = {}',
+            '',
+            '',
+            'def provide(component_type, instance):',
+            '    """',
+            '    Provides an instance that was registered with the container, which must be done before it\'s resolved.',
+            '    """',
+            '    _instances[component_type] = instance',
+            '',
+            '',
+            'def resolve(component_type, **kwargs):',
+            '    return RESOLVERS[component_type](**kwargs)',
+            '',
+            '',
+            'def _missing(component_type):',
+            '    def missing(**kwargs):',
+            '        raise LookupError("The requested type %r was not registered." % (component_type,))',
+            '    return missing',
+            '',
+            '',
+            'class _Container(object):',
+            '    """',
+            '    Stands in for the container and component context, for callbacks and relationships.',
+            '    """',
+            '    def resolve(self, component_type, **kwargs):',
+            '        return RESOLVERS[component_type](**kwargs)',
+            '',
+            '',
+            '_container = _Container()',
+        ])
+
+        footer = ['', '', 'RESOLVERS = {']
+        footer.extend('    %s: %s,' % (self.expression(key), name) for (key, name) in self.keys.items()
+                      if not name.startswith('_missing'))
+        footer.append('}')
+        return '\n'.join(header + body + footer) + '\n'
+
+    def component(self, registration, name):
+        lines = ['', '']
+        if isinstance(registration, container._InstanceRegistration):
+            keys = [key for (key, resolver) in self.keys.items() if resolver == 'resolve_' + name]
+            lines.extend([
+                'def resolve_%s(**kwargs):' % name,
+                '    return _instances[%s]' % self.expression(keys[0]),
+            ])
+            return lines
+
+        lines.append('def _create_%s(kwargs):' % name)
+        for (arg_name, arg_type) in registration.argument_types.items():
+            lines.extend([
+                '    if %r not in kwargs:' % arg_name,
+                '        kwargs[%r] = %s' % (arg_name, self.argument(arg_type)),
+            ])
+
+        if isinstance(registration, container._CallbackRegistration):
+            target = self.reference(registration._callback)
+            call = '%s(**kwargs)' % target if registration._injected else '%s(_container)' % target
+            if inspect.iscoroutinefunction(registration._callback) and registration.owns_instances:
+                # kept by the scope, so awaitable by each consumer as when resolved via the container
+                self.imports.update(('dic.container', 'functools'))
+                call = 'dic.container._SharedResult(%s, functools.partial(%s%s))' % (
+                    call, target, ', **kwargs' if registration._injected else ', _container')
+        else:
+            call = '%s(**kwargs)' % self.reference(registration.class_type)
+
+        if registration.decorators:
+            lines.append('    instance = %s' % call)
+            for decorator in registration.decorators:
+                lines.append('    instance = %s(instance)' % self.reference(decorator))
+            lines.append('    return instance')
+        else:
+            lines.append('    return %s' % call)
+        lines.extend(['', ''])
+
+        component_scope = registration.component_scope
+        if type(component_scope) is scope.InstancePerDependency:
+            lines.extend([
+                'def resolve_%s(**kwargs):' % name,
+                '    return _create_%s(kwargs)' % name,
+            ])
+        elif type(component_scope) in (scope.SingleInstance, scope.SingleInstancePerProcess):
+            lines.extend([
+                '_%s = None' % name,
+                '_%s_lock = threading.RLock()' % name,
+                '',
+                '',
+                'def resolve_%s(**kwargs):' % name,
+                '    global _%s' % name,
+                '    instance = _%s' % name,
+                '    if instance is None:',
+                '        with _%s_lock:' % name,
+                '            if _%s is None:' % name,
+                '                _%s = _create_%s(kwargs)' % (name, name),
+                '            instance = _%s' % name,
+                '    return instance',
+            ])
+            if type(component_scope) is scope.SingleInstancePerProcess:
+                self.imports.add('os')
+                lines.extend([
+                    '',
+                    '',
+                    'def _forget_%s():' % name,
+                    '    global _%s, _%s_lock' % (name, name),
+                    '    _%s = None' % name,
+                    '    _%s_lock = threading.RLock()' % name,
+                    '',
+                    '',
+                    'os.register_at_fork(after_in_child=_forget_%s)' % name,
+                ])
+        elif type(component_scope).new is scope.Scope.new:
+            # any other scope that isn't configured
+            lines.extend([
+                '_%s_scope = %s()' % (name, self.reference(type(component_scope))),
+                '',
+                '',
+                'def resolve_%s(**kwargs):' % name,
+                '    return _%s_scope.instance(lambda: _create_%s(kwargs))' % (name, name),
+            ])
+        else:
+            raise CodegenError("Configured %s scopes can't be generated." % type(component_scope).__name__)
+        return lines
+
+
+def generate(component_container, source=None):
+    """
+    Generates the source of a module wiring the components of a container with plain functions, e.g. resolve_Service()
+    for a registered Service class, and resolve(component_type) to resolve by type. Singletons are module level.
+    Classes, callbacks and decorators are referenced by their qualified name, so must be importable by the module.
+    Registered instances aren't generated, they're given to the generated module's provide(component_type, instance).
+    Components aren't disposed by the generated module.
+    :param component_container: The container to generate from.
+    :param source: Where the container came from, noted in the generated module.
+    :return: The source of the module.
+    :raises CodegenError: If a registration can't be generated, e.g. a lambda callback or an open generic.
+    """
+    return _Generator(component_container).generate(source)
+
+
+def main(argv=None):
+    from . import analyze
+
+    parser = argparse.ArgumentParser(
+        prog='python -m dic.codegen', description='Generates a module wiring the components of a container builder.')
+    parser.add_argument('target', help='package.module:name of a ContainerBuilder or Module')
+    parser.add_argument('--output', help='the file to write the module to, defaults to stdout')
+    parser.add_argument('--check', metavar='MODULE', help='check the given generated module is up to date instead')
+    args = parser.parse_args(argv)
+
+    if '' not in sys.path:
+        sys.path.insert(0, '')
+
+    component_container = analyze.load(args.target).build()
+    if args.check:
+        try:
+            check(importlib.import_module(args.check), component_container)
+        except CodegenError as error:
+            sys.exit(str(error))
+        return
+
+    try:
+        source = generate(component_container, args.target)
+    except CodegenError as error:
+        sys.exit(str(error))
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(source)
+    else:
+        sys.stdout.write(source)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,52 +1,80 @@
 import abc
+import collections
 import copy
-import inspect
+import functools
+import gc
+import os
 import threading
+import time
+import types
+import weakref
 from . import rel
 from . import scope
+from . import trace
 
 
 class DependencyResolutionError(Exception):
     pass
 
 
+class DisposalError(Exception):
+    """
+    Raised when one or more owned components failed to dispose, or didn't finish disposing in time.
+    """
+    def __init__(self, errors):
+        """
+        :param errors: List of (component instance, exception) pairs.
+        """
+        super().__init__("%d component(s) failed to dispose: %s" % (
+            len(errors), ', '.join(repr(error) for (instance, error) in errors)))
+        self.errors = errors
+
+
 class _ComponentRegistration(metaclass=abc.ABCMeta):
     def __init__(self, component_scope):
         self.component_scope = component_scope
+        # map of argument name -> argument type, for the dependencies to resolve and pass to _create
+        self.argument_types = {}
+        # functions to wrap each created instance with, innermost first
+        self.decorators = ()
 
-    @abc.abstractmethod
-    def _create(self, component_context, overriding_args):
+    @property
+    def owns_instances(self):
         """
-        Creates a new instance of the component using the given container
-        to resolve dependencies regardless of the scope.
-        :param component_context: The context to resolve dependencies from.
-        :param overriding_args: Overriding arguments to use (by name) instead of resolving them.
-        :return: An instance of the component.
+        Whether the container owns (and so disposes) the instances created by this registration.
         """
-        pass
+        return self.component_scope.owns_instances
 
-    def create(self, component_context, overriding_args):
+    @abc.abstractmethod
+    def _create(self, component_context, argument_map):
         """
-        Creates a new instance of the component, respecting the scope.
-        :param component_context: The context to resolve dependencies from.
-        :param overriding_args: Overriding arguments to use (by name) instead of resolving them.
+        Creates a new instance of the component regardless of the scope.
+        :param component_context: The context the component is being resolved in.
+        :param argument_map: Arguments to create the component with (by name), both resolved dependencies and
+        overriding arguments.
         :return: An instance of the component.
         """
-        return self.component_scope.instance(lambda: self._create(component_context, overriding_args))
+        pass
 
 
 class _ConstructorRegistration(_ComponentRegistration):
     """
     Creates a component via the constructor.
     """
-    def __init__(self, class_type, component_scope):
+    def __init__(self, class_type, component_scope, argument_types=None):
+        """
+        :param class_type: The class to create.
+        :param component_scope: The scope of the component.
+        :param argument_types: Map of argument name -> argument type, defaults to inspecting the constructor.
+        """
         super().__init__(component_scope)
 
         self.class_type = class_type
-        # map of argument name -> argument type
-        self.argument_types = {}
 
-        self._inspect_constructor()
+        if argument_types is None:
+            self._inspect_constructor()
+        else:
+            self.argument_types = dict(argument_types)
 
     def _find_constructor(self):
         """
@@ -54,15 +82,10 @@ class _ConstructorRegistration(_ComponentRegistration):
         :return: The constructor function.
         """
 
-        def isconstructor(object):
-            return inspect.isfunction(object) and object.__name__ == '__init__'
-
-        # find all the dependencies from the constructor
-        constructors = inspect.getmembers(self.class_type, predicate=isconstructor)
-
-        if constructors:
-            name, func = constructors[0]
-            return func
+        # look up __init__ directly rather than via inspect.getmembers(), which gets every member of the class
+        constructor = getattr(self.class_type, '__init__', None)
+        if isinstance(constructor, types.FunctionType) and constructor.__name__ == '__init__':
+            return constructor
 
         # No explicit __init__
         return None
@@ -70,34 +93,187 @@ class _ConstructorRegistration(_ComponentRegistration):
     def _inspect_constructor(self):
         constructor = self._find_constructor()
         if constructor is not None:
-            self.argument_types = constructor.__annotations__
-
-    def _create(self, component_context, overriding_args):
-        argument_map = overriding_args or {}
-        for (arg_name, arg_type) in self.argument_types.items():
-            # not already provided, try resolve the argument
-            if arg_name not in argument_map:
-                argument_map[arg_name] = component_context.resolve(arg_type)
+            self.argument_types = {
+                arg_name: arg_type for (arg_name, arg_type) in constructor.__annotations__.items()
+                if arg_name != 'return'}
 
+    def _create(self, component_context, argument_map):
         return self.class_type(**argument_map)
 
 
+def _new_scope(component_scope):
+    """
+    Creates the scope of a registration.
+    :param component_scope: Either the type of scope, or a configured scope (e.g. dic.scope.Limited(4)) to create a
+    new scope like.
+    :return: The new scope.
+    """
+    if isinstance(component_scope, scope.Scope):
+        return component_scope.new()
+    return component_scope()
+
+
+def _close_type(argument_type, type_map):
+    """
+    Substitutes type variables in an argument type with the type arguments they're bound to.
+    :param argument_type: The argument type, e.g. T or Serializer[T].
+    :param type_map: Map of type variable -> type argument.
+    :return: The closed argument type.
+    """
+    import typing
+
+    if isinstance(argument_type, typing.TypeVar):
+        return type_map.get(argument_type, argument_type)
+
+    # parameterised generics such as Serializer[T], but not bare generic classes
+    parameters = getattr(argument_type, '__parameters__', None)
+    if parameters and not isinstance(argument_type, type):
+        return argument_type[tuple(type_map.get(p, p) for p in parameters)]
+
+    return argument_type
+
+
+class _ClosedGenericRegistration(_ConstructorRegistration):
+    """
+    Creates a specialization of a generic class via the constructor, e.g. SqlRepository[User].
+    """
+    def __init__(self, generic_type, type_arguments, component_scope):
+        # inspect the open class, as the constructor is shared by all specializations
+        super().__init__(generic_type, component_scope)
+
+        type_map = dict(zip(generic_type.__parameters__, type_arguments))
+        self.class_type = generic_type[type_arguments]
+        self.argument_types = {
+            arg_name: _close_type(arg_type, type_map) for (arg_name, arg_type) in self.argument_types.items()}
+
+
+class _GenericRegistration(object):
+    """
+    An open generic registration, closed over the type arguments of a specialization when it's first requested.
+    """
+    def __init__(self, generic_type, scope_type):
+        self.generic_type = generic_type
+        # each specialization gets its own scope, e.g. a SingleInstance per specialization
+        self.scope_type = scope_type
+        # carried over to each specialization
+        self.decorators = ()
+
+    def close(self, type_arguments):
+        """
+        Creates a registration for the specialization with the given type arguments.
+        :param type_arguments: The type arguments of the requested specialization, bound positionally.
+        :return: The closed registration.
+        """
+        parameters = self.generic_type.__parameters__
+        if len(parameters) != len(type_arguments):
+            raise DependencyResolutionError(
+                "The generic type %s has %d type parameters, but %d type arguments were requested." % (
+                    self.generic_type.__name__, len(parameters), len(type_arguments)))
+
+        registration = _ClosedGenericRegistration(
+            self.generic_type, tuple(type_arguments), _new_scope(self.scope_type))
+        registration.decorators = self.decorators
+        return registration
+
+
 class _CallbackRegistration(_ComponentRegistration):
+    """
+    Creates a component via a callback, either of the form fn(component_context), or with annotated parameters to
+    inject like a constructor.
+    """
     def __init__(self, callback, component_scope):
         super().__init__(component_scope)
         self._callback = callback
+        self._injected = self._inspect_callback()
+
+    def _inspect_callback(self):
+        """
+        Finds the dependencies from the annotated parameters of the callback.
+        :return: Whether the callback has its parameters injected, i.e. has no required parameter without an
+        annotation (such as component_context).
+        """
+        import inspect
+
+        try:
+            parameters = inspect.signature(self._callback).parameters.values()
+        except (TypeError, ValueError):
+            # e.g. some builtins, assume the original form
+            return False
+
+        for parameter in parameters:
+            if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+                continue
+            if parameter.annotation is parameter.empty:
+                if parameter.default is parameter.empty:
+                    self.argument_types = {}
+                    return False
+                continue
+            self.argument_types[parameter.name] = parameter.annotation
+        return True
+
+    def _create(self, component_context, argument_map):
+        instance = self._call(component_context, argument_map)
+        if type(instance) is types.CoroutineType and self.owns_instances:
+            # an async callback, whose coroutine can only be awaited once but is kept by the scope for every consumer
+            return _SharedResult(instance, functools.partial(self._call, component_context, argument_map))
+        return instance
 
-    def _create(self, component_context, overriding_args):
+    def _call(self, component_context, argument_map):
+        if self._injected:
+            return self._callback(**argument_map)
         return self._callback(component_context)
 
 
+class _SharedResult(object):
+    """
+    The result of an async callback kept by its scope (e.g. a SingleInstance), which can be awaited any number of
+    times, unlike the coroutine itself. The coroutine runs as a task the first time it's awaited, and concurrent awaits share it. If it
+    fails (or is cancelled), the callback is called again by the next await.
+    """
+    def __init__(self, coroutine, create):
+        """
+        :param coroutine: The coroutine returned by the callback.
+        :param create: Function to call the callback again, of the form fn().
+        """
+        self._coroutine = coroutine
+        self._create = create
+        self._task = None
+        self._done = False
+        self._result = None
+
+    def __await__(self):
+        return self._get().__await__()
+
+    async def _get(self):
+        if self._done:
+            return self._result
+
+        import asyncio
+
+        task = self._task
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            coroutine = self._coroutine if self._coroutine is not None else self._create()
+            self._coroutine = None
+            task = self._task = asyncio.ensure_future(coroutine)
+        # cancelling one awaiter mustn't cancel the task the others are waiting for
+        result = await asyncio.shield(task)
+        self._result = result
+        self._done = True
+        return result
+
+
 class _InstanceRegistration(_ComponentRegistration):
-    def __init__(self, instance):
+    # instances are created outside of the container, so whoever created them is responsible for disposing them
+    owns_instances = False
+
+    def __init__(self, instance, per_worker=False):
         # the scope doesn't matter, but SingleInstance is what it'll always be
         super().__init__(scope.SingleInstance())
         self._instance = instance
+        # whether each worker process provides its own instance, rather than a copy of this one
+        self.per_worker = per_worker
 
-    def _create(self, component_context, overriding_args):
+    def _create(self, component_context, argument_map):
         return self._instance
 
     def __deepcopy__(self, memo):
@@ -110,8 +286,13 @@ class _ComponentContext(object):
     The context of a component resolve operation.
     A context will be created from a top-level resolve, and then all dependencies will be resolved within that context.
     """
-    def __init__(self, container):
+    def __init__(self, container, snapshot=None):
         self._container = container
+        # resolve against the registrations as they were when the resolve started, even if they're updated meanwhile
+        self._snapshot = container._snapshot if snapshot is None else snapshot
+        # stack of the owned instances that each component currently being created depends on
+        self._dependencies = [[]]
+        self._trace = None if container.tracer is None else trace._Trace(container.tracer)
 
     def resolve(self, component_type, **kwargs):
         # TODO: split off _container, even though we're an internal class. Still isn't great.
@@ -122,38 +303,852 @@ class _ComponentContext(object):
             return component_type.resolve(self._container)
 
         # normal component
-        if component_type not in self._container.registry_map:
-            raise DependencyResolutionError(
-                "The requested type %s was not found in the container. Is it registered?" % component_type.__name__)
+        return self._container._creator(component_type, self._snapshot).create(self, kwargs)
+
 
-        registration = self._container.registry_map[component_type]
-        return registration.create(self, kwargs)
+class _Creator(object):
+    """
+    A compiled plan to create a component: its registration, and the creators of its arguments.
+    """
+    def __init__(self, container, component_type, registration):
+        # the container the creator was compiled by, which owns the instances it creates
+        self.container = container
+        self.key = component_type
+        self.registration = registration
+        # tuple of (argument name, creator)
+        self.arguments = ()
+
+    def create(self, component_context, overriding_args):
+        """
+        Creates an instance of the component, respecting the scope.
+        :param component_context: The context to create the component in.
+        :param overriding_args: Overriding arguments to use (by name) instead of creating them.
+        :return: An instance of the component.
+        """
+        registration = self.registration
+        component_trace = component_context._trace
+        if component_trace is not None:
+            node = component_trace.begin(self.key, registration.component_scope)
+
+        def create_function():
+            if component_trace is not None:
+                node.created = True
+
+            argument_map = overriding_args or {}
+            for (arg_name, creator) in self.arguments:
+                # not already provided, create the argument
+                if arg_name not in argument_map:
+                    argument_map[arg_name] = creator.create(component_context, None)
+            instance = registration._create(component_context, argument_map)
+            for decorator in registration.decorators:
+                instance = decorator(instance)
+
+            # a constructor can't be interrupted, so check once it's done (arguments have been checked the same way)
+            remaining = scope._remaining()
+            if remaining is not None and remaining <= 0:
+                # never handed out, so nothing else will dispose it
+                if _is_disposable(instance):
+                    _dispose_instance(instance)
+                raise scope.ResolveTimeoutError("Timed out creating %s." % (_type_name(self.key),))
+            return instance
+
+        dependencies = component_context._dependencies
+        dependencies.append([])
+        try:
+            instance = registration.component_scope.instance(create_function)
+        except scope.ResolveTimeoutError:
+            if component_trace is not None:
+                component_trace.timed_out(node)
+            raise
+        finally:
+            created_with = dependencies.pop()
+            if component_trace is not None:
+                component_trace.end(node)
+
+        self.container._track(registration, instance, created_with, dependencies[-1])
+        return instance
+
+
+class _RelationshipCreator(object):
+    """
+    Creates a relationship argument, e.g. a dic.rel.Factory.
+    """
+    def __init__(self, container, relationship):
+        # the container the creator was compiled by, which the relationship resolves with. Not the container of the
+        # context, as a derived container shares its parent's creators, and what they create outlives the derived one
+        self.container = container
+        self.relationship = relationship
+        # the type the relationship is for, if known
+        self.key = getattr(relationship, 'component_type', None)
+
+    def create(self, component_context, overriding_args):
+        # note that relationships get the container as they're all currently lazy
+        return self.relationship.resolve(self.container)
+
+
+class _MissingCreator(object):
+    """
+    Stands in for a component that isn't registered, failing when it's created.
+    """
+    def __init__(self, component_type):
+        self.key = component_type
+
+    def create(self, component_context, overriding_args):
+        raise DependencyResolutionError(
+            "The requested type %s was not found in the container. Is it registered?" % (_type_name(self.key),))
+
+
+def _type_name(component_type):
+    return getattr(component_type, '__name__', component_type)
+
+
+def _is_disposable(instance):
+    return hasattr(instance, 'close') or hasattr(instance, '__exit__') or hasattr(instance, 'aclose')
+
+
+def _dispose_instance(instance):
+    """
+    Disposes the instance via close(), __exit__() or the async aclose(), in that order of preference. An async
+    close() (e.g. of an async client) is run to completion like aclose().
+    """
+    if hasattr(instance, 'close'):
+        result = instance.close()
+    elif hasattr(instance, '__exit__'):
+        result = instance.__exit__(None, None, None)
+    else:
+        result = instance.aclose()
+
+    import inspect
+    if inspect.isawaitable(result):
+        import asyncio
+        asyncio.run(_wait_for(result))
+
+
+async def _wait_for(awaitable):
+    # asyncio.run only takes coroutines, not other awaitables such as futures
+    return await awaitable
+
+
+class _OwnedInstance(object):
+    """
+    A disposable instance owned by the container, and the owned instances it was created with.
+    """
+    def __init__(self, instance, dependencies):
+        self.instance = instance
+        self.dependencies = dependencies
+
+
+class _Snapshot(object):
+    """
+    The registrations of a container at a point in time, and the creators compiled from them.
+    A snapshot is never changed once published, other than caching what's compiled from its registrations. Updates
+    publish a new snapshot instead, so resolves can read a snapshot without locking.
+    """
+    def __init__(self, registry_map, generic_map, creators=None, dependents=None):
+        """
+        :param registry_map: A map of type -> ComponentRegistration
+        :param generic_map: A map of generic type -> open generic registration
+        :param creators: A map of type -> compiled _Creator (or _MissingCreator)
+        :param dependents: A map of type -> set of types whose creators depend on it
+        """
+        self.registry_map = registry_map
+        self.generic_map = generic_map
+        self.creators = creators or {}
+        self.dependents = dependents or {}
+        # service type -> read-only map of key -> _IndexEntry, for the keyed registrations of the type
+        self.indexes = {}
+        # type -> number of times it's been resolved, for the types with compiled creators
+        self.resolve_counts = {}
+        # type -> function to create the component, for the types resolved often enough to specialize
+        self.specialized = {}
+
+
+def _is_keyed(component_type):
+    """
+    Whether the type is that of a keyed registration, i.e. (service type, key).
+    """
+    return type(component_type) is tuple and len(component_type) == 2 and isinstance(component_type[0], type)
+
+
+class _IndexEntry(object):
+    """
+    Creates the component registered for a key of a dic.rel.Index, via its compiled creator.
+    """
+    def __init__(self, container, creator, snapshot):
+        self._container = container
+        self._creator = creator
+        self._snapshot = snapshot
+
+    def __call__(self, **kwargs):
+        return self._creator.create(_ComponentContext(self._container, self._snapshot), kwargs)
+
+
+class _Specializer(object):
+    """
+    Generates a function creating a component in a single expression, for types resolved often enough to be worth it.
+    Singletons that have been created are inlined as constants, and components created per dependency via their
+    constructor (or an injected callback) are inlined as calls, with the calls creating their arguments nested within.
+    Anything else (e.g. other scopes, or singletons not created yet) is created via its creator as usual.
+    """
+    # how deep to inline the dependency tree, beyond which creators are used, to stay within the compiler's limits
+    max_depth = 32
+
+    def __init__(self, container, snapshot):
+        self.namespace = {'_context': functools.partial(_ComponentContext, container, snapshot)}
+
+    def value(self, prefix, value):
+        """
+        :return: The name of the value in the generated function's namespace.
+        """
+        name = '%s%d' % (prefix, len(self.namespace))
+        self.namespace[name] = value
+        return name
+
+    def expression(self, creator, depth):
+        """
+        :return: An expression creating the component of the creator.
+        """
+        if type(creator) is _RelationshipCreator:
+            return '%s.resolve(%s)' % (
+                self.value('_relationship', creator.relationship), self.value('_container', creator.container))
+
+        if type(creator) is _Creator and depth < self.max_depth:
+            registration = creator.registration
+            component_scope = registration.component_scope
+            if type(component_scope) in (scope.SingleInstance, scope.SingleInstancePerProcess):
+                # already tracked by the container when it was created
+                if component_scope.component_instance is not None:
+                    return self.value('_instance', component_scope.component_instance)
+            elif type(component_scope) is scope.InstancePerDependency:
+                # not owned by the container, so there's nothing to track
+                call = self.call(registration, creator.arguments, depth)
+                if call is not None:
+                    return call
+
+        return '%s.create(_context(), None)' % self.value('_creator', creator)
+
+    def call(self, registration, arguments, depth):
+        """
+        :return: An expression calling the constructor or callback of the registration, or None if it can't be called
+        directly.
+        """
+        if type(registration)._create is _ConstructorRegistration._create:
+            target = registration.class_type
+        elif isinstance(registration, _CallbackRegistration) and registration._injected:
+            # only inlined per dependency, so its result is never kept and shared
+            target = registration._callback
+        else:
+            return None
+
+        call = '%s(%s)' % (self.value('_create', target), ', '.join(
+            '%s=%s' % (arg_name, self.expression(argument, depth + 1)) for (arg_name, argument) in arguments))
+        for decorator in registration.decorators:
+            call = '%s(%s)' % (self.value('_decorator', decorator), call)
+        return call
+
+    def specialize(self, creator):
+        """
+        :param creator: The creator of the component to specialize.
+        :return: Function of the form fn() creating the component, or None if nothing about it could be inlined.
+        """
+        expression = self.expression(creator, 0)
+        if expression.startswith('_creator'):
+            return None
+
+        source = 'def specialized():\n    return %s\n' % expression
+        exec(compile(source, '<dic specialized %s>' % (_type_name(creator.key),), 'exec'), self.namespace)
+        return self.namespace['specialized']
 
 
 class Container(object):
     """
     IoC container.
     """
-    def __init__(self, registry_map):
+    def __init__(self, registry_map, generic_map=None):
         """
         Creates a new container
         :param registry_map: A map of type -> ComponentRegistration
+        :param generic_map: A map of generic type -> open generic registration
         """
-        self.registry_map = registry_map
-        # The resolve lock is recursive as a constructor may call a factory (which calls container.resolve()),
-        # without a recursive lock, this would be a deadlock
-        self._resolve_lock = threading.RLock()
+        self._snapshot = _Snapshot(registry_map, generic_map or {})
+        # held while compiling creators, and while publishing a new snapshot
+        self._compile_lock = threading.RLock()
+        # id(instance) -> _OwnedInstance, in creation order
+        self._owned = {}
+        # held while adding to or taking from _owned
+        self._owned_lock = threading.Lock()
+        # id(instance) -> instance, for the instances owned by the parent process, which a forked child never owns
+        self._parent_owned = {}
+        # a dic.trace.Tracer to trace resolves with, if any
+        self.tracer = None
+        # the number of times a type must be resolved before a specialized function is generated to create it, or
+        # None to never specialize
+        self.specialize_threshold = 100
+        _containers.add(self)
 
-    def resolve(self, component_type, **kwargs):
+    @property
+    def registry_map(self):
+        """
+        A read-only map of type -> ComponentRegistration.
+        """
+        return types.MappingProxyType(self._snapshot.registry_map)
+
+    @property
+    def generic_map(self):
+        """
+        A read-only map of generic type -> open generic registration.
+        """
+        return types.MappingProxyType(self._snapshot.generic_map)
+
+    def resolve(self, component_type, resolve_timeout=None, **kwargs):
         """
         Resolves an instance of the component type.
+        There's no container-wide lock, so resolves on different threads run in parallel. Scopes lock as required,
+        e.g. a SingleInstance component is only created once, and is read without locking after that.
         :param component_type: The type of the component (e.g. a class).
+        :param resolve_timeout: The time in seconds the resolve may take, including waiting on other threads creating
+        the same components, or None for no limit. Constructors can't be interrupted, so one that overruns is only
+        noticed once it returns. Named so it doesn't collide with the overriding arguments.
         :param kwargs: Overriding arguments to use (by name) instead of resolving them.
         :return: An instance of the component.
+        :raises dic.scope.ResolveTimeoutError: If the resolve took longer than resolve_timeout. Whatever was being
+        created is discarded, rather than kept in its scope.
+        """
+        snapshot = self._snapshot
+        # only plain resolves are specialized, anything else takes the usual path, including resolves that are part of
+        # another with a timeout
+        plain = resolve_timeout is None and not kwargs and self.tracer is None and scope._remaining() is None
+        if plain:
+            specialized = snapshot.specialized.get(component_type)
+            if specialized is not None:
+                return specialized()
+
+        context = _ComponentContext(self, snapshot)
+        if resolve_timeout is not None:
+            with scope._Deadline(resolve_timeout):
+                return context.resolve(component_type, **kwargs)
+
+        instance = context.resolve(component_type, **kwargs)
+        if plain and self.specialize_threshold is not None:
+            self._count(component_type, snapshot)
+        return instance
+
+    def resolve_many(self, component_types, max_workers=None):
+        """
+        Resolves an instance of each of the component types in a single resolve operation, e.g. the root services of
+        a worker at startup. The creators of all of the types are compiled together, and all are resolved against the
+        same registrations, even if the container is updated meanwhile.
+        :param component_types: The types of the components.
+        :param max_workers: The number of threads to resolve the components on concurrently, or None to resolve them
+        one after another on the calling thread.
+        :return: A list of the instances, in the same order as the component types.
+        """
+        component_types = list(component_types)
+        snapshot = self._snapshot
+
+        uncompiled = [
+            component_type for component_type in component_types
+            if not isinstance(component_type, rel.Relationship) and component_type not in snapshot.creators]
+        if uncompiled:
+            with self._compile_lock:
+                for component_type in uncompiled:
+                    self._creator(component_type, snapshot)
+
+        if max_workers is None:
+            context = _ComponentContext(self, snapshot)
+            return [context.resolve(component_type) for component_type in component_types]
+
+        def resolve(component_type):
+            # a context tracks the components being created on its thread, so each thread needs its own
+            return _ComponentContext(self, snapshot).resolve(component_type)
+
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(resolve, component_types))
+
+    def resolve_map(self, component_types, max_workers=None):
+        """
+        Resolves an instance of each of the component types in a single resolve operation, as per resolve_many.
+        :param component_types: The types of the components.
+        :param max_workers: The number of threads to resolve the components on concurrently, or None to resolve them
+        one after another on the calling thread.
+        :return: A map of component type -> instance.
         """
-        with self._resolve_lock:
+        component_types = list(component_types)
+        return dict(zip(component_types, self.resolve_many(component_types, max_workers)))
+
+    def with_overrides(self, overrides):
+        """
+        Creates a container derived from this one, with some registrations overridden. E.g. to swap in a mock
+        during a test, or use a variant of a component for one tenant. Deriving a container only costs as much as
+        the number of overrides, as it shares the registrations of this container.
+        Components that don't depend on an overridden type are shared with this container, including singletons.
+        Components that do (directly or via their dependencies) get their own scope in the derived container.
+        :param overrides: Map of type -> instance to use instead. A registration can also be given.
+        :return: The derived container.
+        """
+        registrations = {}
+        for (component_type, override) in overrides.items():
+            if not isinstance(override, _ComponentRegistration):
+                override = _InstanceRegistration(override)
+            registrations[component_type] = override
+
+        return _OverlayContainer(self, registrations)
+
+    def inject(self, function):
+        """
+        Decorator that injects the annotated parameters of a function (sync or async) when it's called, e.g. a
+        request handler. Arguments passed explicitly by the caller are left alone, as are parameters with a default
+        whose type isn't registered. The annotations are read once, and all parameters are resolved in a single
+        resolve operation.
+        :param function: The function to inject.
+        :return: The wrapped function.
+        """
+        import inspect
+
+        # tuple of (name, positional index, creator or parameter type, whether it has a default)
+        parameters = []
+        for (index, parameter) in enumerate(inspect.signature(function).parameters.values()):
+            if parameter.annotation is parameter.empty or \
+                    parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+                continue
+
+            if parameter.kind is parameter.KEYWORD_ONLY:
+                # can never be passed positionally
+                index = None
+
+            argument_type = parameter.annotation
+            if isinstance(argument_type, rel.Relationship):
+                argument_type = _RelationshipCreator(self, argument_type)
+            parameters.append((parameter.name, index, argument_type, parameter.default is not parameter.empty))
+
+        parameters = tuple(parameters)
+
+        def inject_arguments(args, kwargs):
             context = _ComponentContext(self)
-            return context.resolve(component_type, **kwargs)
+            for (name, index, argument_type, has_default) in parameters:
+                if name in kwargs or (index is not None and index < len(args)):
+                    continue
+
+                # look up the creator each call, so updated registrations are used
+                creator = argument_type if type(argument_type) is _RelationshipCreator else \
+                    self._creator(argument_type, context._snapshot)
+                if has_default and type(creator) is _MissingCreator:
+                    # e.g. limit: int = 10, left to the default
+                    continue
+                kwargs[name] = creator.create(context, None)
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                inject_arguments(args, kwargs)
+                return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            inject_arguments(args, kwargs)
+            return function(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.dispose()
+
+    def _track(self, registration, instance, dependencies, dependents):
+        """
+        Tracks a resolved instance so it can be disposed in reverse dependency order.
+        :param registration: The registration the instance was resolved from.
+        :param instance: The resolved instance, which may have been newly created or already existed in its scope.
+        :param dependencies: The owned instances resolved while creating the instance.
+        :param dependents: The owned instances of the component depending on this one, to add to.
+        """
+        owned = self._owned.get(id(instance))
+        if owned is None and registration.owns_instances and _is_disposable(instance) and \
+                self._parent_owned.get(id(instance)) is not instance:
+            with self._owned_lock:
+                # may have been created (or taken from the scope) by another thread at the same time
+                owned = self._owned.setdefault(id(instance), _OwnedInstance(instance, dependencies))
+
+        if owned is None:
+            # not something we'll dispose, but whatever depends on it still depends on what it was created with
+            dependents.extend(dependencies)
+        else:
+            dependents.append(owned)
+
+    def prefork(self, component_types=None, freeze=True):
+        """
+        Prepares the container to be shared with forked worker processes, e.g. by a pre-fork server. Singletons are
+        created in the parent so workers share them via copy-on-write rather than each creating their own.
+        Components that can't be shared with a child process (e.g. those holding sockets) should be registered with
+        the SingleInstancePerProcess scope, these are not created here and will be created again in each worker.
+        In a forked child the container's locks are reset automatically, and the child doesn't own (or dispose)
+        anything created by the parent.
+        :param component_types: The types to create, defaults to every SingleInstance registration.
+        :param freeze: Whether to freeze everything created so far (via gc.freeze()), so the garbage collector of
+        a worker doesn't write to (and so copy) the pages the shared objects live on.
+        """
+        if component_types is None:
+            component_types = [
+                component_type for (component_type, registration) in self.registry_map.items()
+                if isinstance(registration.component_scope, scope.SingleInstance) and
+                not isinstance(registration.component_scope, scope.SingleInstancePerProcess) and
+                not isinstance(registration, _InstanceRegistration)]
+
+        for component_type in component_types:
+            self.resolve(component_type)
+
+        if freeze:
+            gc.collect()
+            gc.freeze()
+
+    def dispose(self, timeout=None, max_workers=None):
+        """
+        Disposes the components owned by the container, calling close(), __exit__() or the async aclose() on each.
+        A component is only disposed after everything that depends on it has been disposed, and independent
+        components are disposed concurrently.
+        Instances registered via register_instance and components that are InstancePerDependency are not owned by
+        the container, so are not disposed. The container shouldn't be used after it has been disposed.
+        :param timeout: The time in seconds to wait for each component to dispose, or None to wait forever. A
+        component that doesn't finish in time is treated as failed, and its dependencies are then disposed.
+        :param max_workers: The maximum number of components to dispose at once, defaults to the executor default.
+        :raises DisposalError: If any component failed to dispose.
+        """
+        with self._owned_lock:
+            owned = list(self._owned.values())
+            self._owned = {}
+
+        if not owned:
+            return
+
+        # the number of undisposed dependents each owned instance is waiting on
+        waiting_on = {id(o): 0 for o in owned}
+        for o in owned:
+            for dependency in o.dependencies:
+                # dependencies owned by another container (e.g. the parent of a derived container) are left to it
+                if id(dependency) in waiting_on:
+                    waiting_on[id(dependency)] += 1
+
+        import concurrent.futures
+
+        errors = []
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            # future -> (owned instance, deadline)
+            pending = {}
+
+            def submit(o):
+                deadline = None if timeout is None else time.monotonic() + timeout
+                pending[executor.submit(_dispose_instance, o.instance)] = (o, deadline)
+
+            for o in owned:
+                if waiting_on[id(o)] == 0:
+                    submit(o)
+
+            while pending:
+                deadlines = [deadline for (o, deadline) in pending.values() if deadline is not None]
+                wait_for = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+                concurrent.futures.wait(pending, timeout=wait_for, return_when=concurrent.futures.FIRST_COMPLETED)
+
+                now = time.monotonic()
+                for future in list(pending):
+                    o, deadline = pending[future]
+                    if future.done():
+                        if future.exception() is not None:
+                            errors.append((o.instance, future.exception()))
+                    elif deadline is not None and now >= deadline:
+                        errors.append((o.instance, TimeoutError("Timed out disposing %r" % (o.instance,))))
+                    else:
+                        continue
+
+                    del pending[future]
+                    for dependency in o.dependencies:
+                        if id(dependency) not in waiting_on:
+                            continue
+                        waiting_on[id(dependency)] -= 1
+                        if waiting_on[id(dependency)] == 0:
+                            submit(dependency)
+        finally:
+            # don't wait on components that timed out
+            executor.shutdown(wait=False)
+
+        if errors:
+            raise DisposalError(errors)
+
+    def _creator(self, component_type, snapshot):
+        """
+        Gets the compiled creator for the given type, compiling it (and its dependencies) if required.
+        :param component_type: The type of the component.
+        :param snapshot: The snapshot to resolve against.
+        :return: The creator.
+        """
+        creator = snapshot.creators.get(component_type)
+        if creator is None:
+            with self._compile_lock:
+                creator = snapshot.creators.get(component_type)
+                if creator is None:
+                    creator = self._compile(component_type, snapshot)
+        return creator
+
+    def _count(self, component_type, snapshot):
+        """
+        Counts a resolve of the type, specializing it once it's been resolved often enough.
+        """
+        # only compiled components are counted, not e.g. relationships
+        if type(snapshot.creators.get(component_type)) is _Creator:
+            counts = snapshot.resolve_counts
+            # not locked, so concurrent resolves may be counted once, which only delays specializing
+            count = counts[component_type] = counts.get(component_type, 0) + 1
+            if count == self.specialize_threshold:
+                self._specialize(component_type, snapshot)
+
+    def _specialize(self, component_type, snapshot):
+        """
+        Generates a function to create the component of the given type more directly than via its creator. Only done
+        for types that are resolved often, as generating it costs far more than a resolve.
+        """
+        with self._compile_lock:
+            specialized = _Specializer(self, snapshot).specialize(snapshot.creators[component_type])
+            if specialized is not None:
+                snapshot.specialized[component_type] = specialized
+
+    def _index(self, component_type):
+        """
+        Gets the index of the keyed registrations of the given type, compiling the creators of all of them the first
+        time it's requested.
+        :param component_type: The service type, as registered with a key.
+        :return: A read-only map of key -> function to create the component registered with that key.
+        """
+        snapshot = self._snapshot
+        index = snapshot.indexes.get(component_type)
+        if index is None:
+            with self._compile_lock:
+                index = snapshot.indexes.get(component_type)
+                if index is None:
+                    index = types.MappingProxyType({
+                        key[1]: _IndexEntry(self, self._creator(key, snapshot), snapshot)
+                        for key in list(snapshot.registry_map) if _is_keyed(key) and key[0] is component_type})
+                    snapshot.indexes[component_type] = index
+        return index
+
+    def _compile(self, component_type, snapshot):
+        registration = self._find_registration(component_type, snapshot)
+        if registration is None:
+            # may be provided as an overriding argument instead, so only fail if it's created
+            creator = _MissingCreator(component_type)
+            snapshot.creators[component_type] = creator
+            return creator
+
+        # cache before compiling the arguments, so a circular dependency doesn't compile forever
+        creator = _Creator(self, component_type, registration)
+        snapshot.creators[component_type] = creator
+        creator.arguments = tuple(
+            (arg_name, self._argument_creator(arg_type, snapshot)) for (arg_name, arg_type) in
+            registration.argument_types.items())
+
+        for (arg_name, argument) in creator.arguments:
+            if argument.key is not None:
+                snapshot.dependents.setdefault(argument.key, set()).add(component_type)
+        return creator
+
+    def _update(self, registry, generic_registry):
+        """
+        Adds or replaces registrations, recompiling only the creators that depend on them.
+        Singletons that depend on a replaced type (directly, or via their dependencies) are created again when
+        they're next resolved, all other singletons are kept.
+        The registrations are published as a new snapshot, so resolves already in progress aren't blocked and
+        finish with the registrations they started with.
+        :param registry: Map of type -> registration to add or replace.
+        :param generic_registry: Map of generic type -> open generic registration to add or replace.
+        """
+        with self._compile_lock:
+            snapshot = self._snapshot
+            registry_map = dict(snapshot.registry_map)
+            generic_map = dict(snapshot.generic_map)
+            replaced = set(registry)
+
+            # specializations closed by a replaced open generic need closing again
+            for (component_type, registration) in snapshot.registry_map.items():
+                if isinstance(registration, _ClosedGenericRegistration) and \
+                        component_type.__origin__ in generic_registry:
+                    del registry_map[component_type]
+                    replaced.add(component_type)
+
+            registry_map.update(registry)
+            generic_map.update(generic_registry)
+
+            # id(registration) -> the types it's available as
+            aliases = {}
+            for (component_type, registration) in snapshot.registry_map.items():
+                aliases.setdefault(id(registration), []).append(component_type)
+
+            affected = set()
+            pending = list(replaced)
+            # components injected with an index depend on the service type, rather than each keyed registration
+            for component_type in replaced:
+                if _is_keyed(component_type):
+                    pending.extend(snapshot.dependents.get(component_type[0], ()))
+            while pending:
+                component_type = pending.pop()
+                if component_type in affected:
+                    continue
+                affected.add(component_type)
+                pending.extend(snapshot.dependents.get(component_type, ()))
+                if component_type not in replaced:
+                    # the other types the registration is available as share its instances, so are affected too
+                    registration = snapshot.registry_map.get(component_type)
+                    if registration is not None:
+                        pending.extend(aliases[id(registration)])
+
+            # instances of dependents were created with what has been replaced, so they get a new scope. The old
+            # registration is left alone, as resolves in progress may still be using it
+            copies = {}
+            for component_type in affected - replaced:
+                registration = registry_map.get(component_type)
+                if registration is not None:
+                    if id(registration) not in copies:
+                        copies[id(registration)] = copy.copy(registration)
+                        copies[id(registration)].component_scope = registration.component_scope.new()
+                    registry_map[component_type] = copies[id(registration)]
+
+            creators = {
+                component_type: creator for (component_type, creator) in snapshot.creators.items()
+                if component_type not in affected}
+            dependents = {
+                component_type: set(dependent_types) for (component_type, dependent_types) in
+                snapshot.dependents.items()}
+
+            self._snapshot = _Snapshot(registry_map, generic_map, creators, dependents)
+
+    def _find_registration(self, component_type, snapshot):
+        registration = snapshot.registry_map.get(component_type)
+        if registration is None:
+            registration = self._close_generic(component_type, snapshot)
+        return registration
+
+    def _argument_creator(self, argument_type, snapshot):
+        if isinstance(argument_type, rel.Relationship):
+            return _RelationshipCreator(self, argument_type)
+        return self._creator(argument_type, snapshot)
+
+    def _close_generic(self, component_type, snapshot):
+        """
+        Closes an open generic registration for the requested specialization, if there is one. The closed
+        registration is cached in the registry_map so later resolves take the same path as a concrete registration.
+        :param component_type: The requested specialization, e.g. Repository[User].
+        :param snapshot: The snapshot to resolve against.
+        :return: The closed registration, or None if there's no open generic registration for it.
+        """
+        if not snapshot.generic_map:
+            # nothing to close, and no need to import typing
+            return None
+
+        import typing
+
+        generic_registration = snapshot.generic_map.get(typing.get_origin(component_type))
+        if generic_registration is None:
+            return None
+
+        registration = generic_registration.close(typing.get_args(component_type))
+        snapshot.registry_map[component_type] = registration
+        return registration
+
+
+class _OverlayContainer(Container):
+    """
+    A container derived from another, with some registrations overridden. Lookups fall through to the parent as it
+    was when derived, and the parent's creators are shared unless they depend on an overridden type.
+    """
+    def __init__(self, parent, overrides):
+        """
+        :param parent: The container to derive from.
+        :param overrides: Map of type -> registration to use instead.
+        """
+        parent_snapshot = parent._snapshot
+        # registrations local to this container (e.g. closed generics) go in the first map
+        super().__init__(
+            collections.ChainMap({}, overrides, parent_snapshot.registry_map), parent_snapshot.generic_map)
+        self._parent = parent
+        self._parent_snapshot = parent_snapshot
+        self.tracer = parent.tracer
+        self.specialize_threshold = parent.specialize_threshold
+        self._overrides = overrides
+        # type -> whether its creator depends on an overridden type
+        self._affected = {}
+        # id(parent registration) -> copy with its own scope
+        self._local_registrations = {}
+
+    def _update(self, registry, generic_registry):
+        raise TypeError("Derived containers can't be updated, derive a new container instead.")
+
+    def _compile(self, component_type, snapshot):
+        if self._is_affected(component_type):
+            return super()._compile(component_type, snapshot)
+
+        creator = self._parent._creator(component_type, self._parent_snapshot)
+        snapshot.creators[component_type] = creator
+        return creator
+
+    def _is_affected(self, component_type):
+        affected = self._affected.get(component_type)
+        if affected is None:
+            # assume not while checking the dependencies, in case they're circular
+            self._affected[component_type] = False
+            affected = component_type in self._overrides or component_type in self._snapshot.registry_map.maps[0]
+            if not affected:
+                creator = self._parent._creator(component_type, self._parent_snapshot)
+                affected = any(
+                    argument.key is not None and (self._is_affected(argument.key) or (
+                        isinstance(getattr(argument, 'relationship', None), rel.Index) and
+                        self._is_index_affected(argument.key)))
+                    for (arg_name, argument) in getattr(creator, 'arguments', ()))
+            self._affected[component_type] = affected
+        return affected
+
+    def _is_index_affected(self, component_type):
+        """
+        Whether any keyed registration of the service type is affected, so an index of it differs from the parent's.
+        """
+        return any(
+            _is_keyed(key) and key[0] is component_type and self._is_affected(key)
+            for key in list(self._snapshot.registry_map))
+
+    def _find_registration(self, component_type, snapshot):
+        registration = super()._find_registration(component_type, snapshot)
+        if registration is None or component_type in self._overrides or \
+                isinstance(registration, _InstanceRegistration):
+            return registration
+
+        # the parent's scope may hold instances created with the overridden dependencies, so use a new scope
+        local_registration = self._local_registrations.get(id(registration))
+        if local_registration is None:
+            local_registration = copy.copy(registration)
+            local_registration.component_scope = registration.component_scope.new()
+            self._local_registrations[id(registration)] = local_registration
+        return local_registration
+
+
+# containers to reset in a forked child process
+_containers = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for container in list(_containers):
+        # the locks may have been held by another thread in the parent, which doesn't exist in the child
+        container._compile_lock = threading.RLock()
+        container._owned_lock = threading.Lock()
+        # anything created so far is owned by the parent, and mustn't be taken over when resolved again
+        container._parent_owned = dict(container._parent_owned)
+        container._parent_owned.update((key, o.instance) for (key, o) in container._owned.items())
+        container._owned = {}
+        # may have inlined singletons that are created again in the child
+        container._snapshot.specialized.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
 
 
 class Module(metaclass=abc.ABCMeta):
@@ -175,8 +1170,14 @@ class ContainerBuilder(object):
     """
     def __init__(self):
         self.registry = {}
+        self.generic_registry = {}
+        # type -> list of decorators, in the order registered
+        self.decorators = {}
+
+    def _register(self, class_type, registration, register_as, registry=None, key=None):
+        if registry is None:
+            registry = self.registry
 
-    def _register(self, class_type, registration, register_as):
         if register_as is None:
             register_as = class_type
 
@@ -185,38 +1186,117 @@ class ContainerBuilder(object):
             register_as = [register_as]
 
         for available_as in register_as:
-            self.registry[available_as] = registration
+            if key is not None:
+                available_as = (available_as, key)
+            registry[available_as] = registration
 
-    def register_class(self, class_type, component_scope=scope.InstancePerDependency, register_as=None):
+    def register_class(self, class_type, component_scope=scope.InstancePerDependency, register_as=None, key=None):
         """
         Registers the given class for creation via its constructor.
         :param class_type: The class type.
-        :param component_scope: The scope of the component, defaults to instance per dependency.
+        :param component_scope: The type of scope of the component, or a configured scope to create the component's
+        scope like (e.g. dic.scope.Limited(4)). Defaults to instance per dependency.
         :param register_as: The types to register the class as, defaults to the given class_type.
+        :param key: The key to register the class with, if any. Keyed registrations are resolved as
+        (type, key), or via a dic.rel.Index of the type.
+        """
+        registration = _ConstructorRegistration(class_type, _new_scope(component_scope))
+        self._register(class_type, registration, register_as, key=key)
+
+    def register_generic(self, class_type, component_scope=scope.InstancePerDependency, register_as=None):
+        """
+        Registers the given generic class (e.g. SqlRepository(Generic[T])) as an open generic. Specializations such as
+        SqlRepository[User] are created via the constructor, with type variables in the constructor annotations
+        substituted by the requested type arguments.
+        :param class_type: The generic class type.
+        :param component_scope: The type of scope of each specialization, or a configured scope to create their scopes
+        like. Defaults to instance per dependency.
+        :param register_as: The generic types to register the class as, defaults to the given class_type. Type
+        arguments are bound to the type parameters of class_type positionally.
         """
-        registration = _ConstructorRegistration(class_type, component_scope())
-        self._register(class_type, registration, register_as)
+        registration = _GenericRegistration(class_type, component_scope)
+        self._register(class_type, registration, register_as, self.generic_registry)
 
-    def register_callback(self, class_type, callback, component_scope=scope.InstancePerDependency, register_as=None):
+    def register_callback(
+            self, class_type, callback, component_scope=scope.InstancePerDependency, register_as=None, key=None):
         """
         Registers the given class for creation via the given callback.
         :param class_type: The class type.
-        :param callback: The function to call to create/get an instance, of the form fn(component_context)
-        :param component_scope: The scope of the component, defaults to instance per dependency.
+        :param callback: The function to call to create/get an instance. Either of the form fn(component_context), or
+        with annotated parameters that are injected like a constructor's, e.g. fn(config: Config).
+        :param component_scope: The type of scope of the component, or a configured scope to create the component's
+        scope like (e.g. dic.scope.Limited(4)). Defaults to instance per dependency.
         :param register_as: The types to register the class as, defaults to the given class_type.
+        :param key: The key to register the class with, if any. Keyed registrations are resolved as
+        (type, key), or via a dic.rel.Index of the type.
         """
-        registration = _CallbackRegistration(callback, component_scope())
-        self._register(class_type, registration, register_as)
+        registration = _CallbackRegistration(callback, _new_scope(component_scope))
+        self._register(class_type, registration, register_as, key=key)
 
-    def register_instance(self, class_type, instance, register_as=None):
+    def register_instance(self, class_type, instance, register_as=None, per_worker=False, key=None):
         """
         Registers the given instance (already created).
         :param class_type: The class type.
         :param instance: The instance to register.
         :param register_as: The types to register the class as, defaults to the given class_type.
+        :param per_worker: Whether worker processes rebuilding the container from a dic.plan.ContainerPlan provide
+        their own instance, e.g. as the instance can't be pickled. Otherwise workers get a pickled copy.
+        :param key: The key to register the class with, if any. Keyed registrations are resolved as
+        (type, key), or via a dic.rel.Index of the type.
         """
-        registration = _InstanceRegistration(instance)
-        self._register(class_type, registration, register_as)
+        registration = _InstanceRegistration(instance, per_worker)
+        self._register(class_type, registration, register_as, key=key)
+
+    def register_decorator(self, class_type, decorator):
+        """
+        Registers a decorator to wrap each instance of the given type with when it's created, e.g. to add caching,
+        retries or metrics. Decorators are applied in the order they're registered, the first being innermost. The
+        decorated instance is what the scope holds, so a SingleInstance component is only decorated once.
+        Decorators apply to the registration of the type, so to all of the types it's registered as. Decorating an
+        open generic registered via register_generic decorates each of its specializations. Decorators of types that
+        aren't registered are ignored.
+        :param class_type: The type to decorate, as registered.
+        :param decorator: Function of the form fn(instance), returning the decorated instance.
+        """
+        self.decorators.setdefault(class_type, []).append(decorator)
+
+    def _decorate(self, registry, registry_map=None, generic_registry=None, generic_map=None):
+        """
+        Applies the registered decorators to copies of the registrations they're for.
+        :param registry: Map of type -> registration to decorate, e.g. the copy of the registry being built.
+        :param registry_map: The registrations of the container being updated, for decorators of types that aren't
+        in registry. Those registrations are added to registry, with their existing decorators and a new scope.
+        :param generic_registry: Map of generic type -> open generic registration to decorate, so that each
+        specialization is decorated.
+        :param generic_map: The open generic registrations of the container being updated, for decorators of types
+        that aren't in generic_registry. Those registrations are added to generic_registry.
+        """
+        decorated = {}
+        for (class_type, decorators) in self.decorators.items():
+            if class_type in registry:
+                (target, source) = (registry, registry)
+            elif registry_map is not None and class_type in registry_map:
+                (target, source) = (registry, registry_map)
+            elif generic_registry is not None and class_type in generic_registry:
+                (target, source) = (generic_registry, generic_registry)
+            elif generic_map is not None and class_type in generic_map:
+                (target, source) = (generic_registry, generic_map)
+            else:
+                continue
+
+            registration = source[class_type]
+            copied = decorated.get(id(registration))
+            if copied is None:
+                copied = copy.copy(registration)
+                if source is registry or source is registry_map:
+                    # existing instances (e.g. of a container being updated) weren't created with the decorators
+                    copied.component_scope = registration.component_scope.new()
+                decorated[id(registration)] = copied
+                # keep it shared by all of the types it's registered as
+                for (key, other) in list(source.items()):
+                    if other is registration and (source is target or key not in target):
+                        target[key] = copied
+            copied.decorators += tuple(decorators)
 
     def register_module(self, module):
         """
@@ -225,6 +1305,25 @@ class ContainerBuilder(object):
         """
         module.load(self)
 
+    def update(self, container):
+        """
+        Adds the components registered with this builder to an already built container, replacing any existing
+        registrations of the same types. E.g. to add components from a plugin loaded after startup.
+        Only the parts of the container that depend on the added registrations are rebuilt. Singletons that depend on
+        a replaced type are created again when next resolved, all other singletons are kept.
+        Decorators registered with this builder are added to those of the container's existing registrations.
+        :param container: The container to update. Containers derived via with_overrides can't be updated.
+        :raises TypeError: If the container was derived via with_overrides.
+        """
+        if isinstance(container, _OverlayContainer):
+            raise TypeError("Derived containers can't be updated, derive a new container instead.")
+
+        # copy the registry so the container is isolated from later registrations
+        registry_copy = copy.deepcopy(self.registry)
+        generic_copy = dict(self.generic_registry)
+        self._decorate(registry_copy, container._snapshot.registry_map, generic_copy, container._snapshot.generic_map)
+        container._update(registry_copy, generic_copy)
+
     def build(self):
         """
         Builds a new container using the registered components.
@@ -232,4 +1331,6 @@ class ContainerBuilder(object):
         """
         # copy the registry so built containers are isolated
         registry_copy = copy.deepcopy(self.registry)
-        return Container(registry_copy)
+        generic_copy = dict(self.generic_registry)
+        self._decorate(registry_copy, generic_registry=generic_copy)
+        return Container(registry_copy, generic_copy)
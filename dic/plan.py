@@ -0,0 +1,195 @@
+import importlib
+from . import container
+from . import scope
+
+
+class PlanError(Exception):
+    pass
+
+
+class _Reference(object):
+    """
+    Reference to a class or function by its qualified name, which is imported again when the plan is built.
+    """
+    def __init__(self, obj):
+        qualified_name = getattr(obj, '__qualname__', '')
+        if '<' in qualified_name:
+            raise PlanError("%r can't be referenced by name, only module level classes and functions can." % (obj,))
+
+        self.module = obj.__module__
+        self.qualified_name = qualified_name
+
+    def load(self):
+        obj = importlib.import_module(self.module)
+        for name in self.qualified_name.split('.'):
+            obj = getattr(obj, name)
+        return obj
+
+    def __repr__(self):
+        return '%s:%s' % (self.module, self.qualified_name)
+
+
+def _encode(value):
+    """
+    Encodes registry keys and argument types. Classes are referenced by name, anything else (e.g. relationships or
+    string keys) is pickled as is.
+    """
+    if isinstance(value, type):
+        return _Reference(value)
+    return value
+
+
+def _decode(value):
+    if isinstance(value, _Reference):
+        return value.load()
+    return value
+
+
+def _encode_scope(component_scope):
+    """
+    Encodes the scope of a registration. Scopes are referenced by type, unless they're configured (i.e. override
+    new()), in which case a new scope like it is pickled.
+    """
+    if isinstance(component_scope, type) or type(component_scope).new is scope.Scope.new:
+        return _Reference(component_scope if isinstance(component_scope, type) else type(component_scope))
+    return component_scope.new()
+
+
+def _decode_scope(value):
+    """
+    :return: The scope type or configured scope, to create a registration's scope with.
+    """
+    if isinstance(value, _Reference):
+        return value.load()
+    return value
+
+
+class _PlanEntry(object):
+    """
+    Describes a registration, and the keys it's registered as.
+    """
+    CLASS = 'class'
+    CALLBACK = 'callback'
+    INSTANCE = 'instance'
+    PER_WORKER = 'per_worker'
+    GENERIC = 'generic'
+
+    def __init__(self, kind, keys, target=None, scope_type=None, argument_types=None):
+        self.kind = kind
+        self.keys = keys
+        self.target = target
+        self.scope_type = scope_type
+        self.argument_types = argument_types
+        # references to the decorators of the registration
+        self.decorators = []
+
+    @staticmethod
+    def from_registration(registration, keys):
+        entry = _PlanEntry._from_registration(registration, keys)
+        entry.decorators = [_Reference(decorator) for decorator in getattr(registration, 'decorators', ())]
+        return entry
+
+    @staticmethod
+    def _from_registration(registration, keys):
+        keys = [_encode(key) for key in keys]
+        if isinstance(registration, container._ConstructorRegistration):
+            return _PlanEntry(
+                _PlanEntry.CLASS, keys, _Reference(registration.class_type),
+                _encode_scope(registration.component_scope),
+                {arg_name: _encode(arg_type) for (arg_name, arg_type) in registration.argument_types.items()})
+
+        if isinstance(registration, container._CallbackRegistration):
+            return _PlanEntry(
+                _PlanEntry.CALLBACK, keys, _Reference(registration._callback),
+                _encode_scope(registration.component_scope))
+
+        if isinstance(registration, container._InstanceRegistration):
+            if registration.per_worker:
+                return _PlanEntry(_PlanEntry.PER_WORKER, keys)
+            return _PlanEntry(_PlanEntry.INSTANCE, keys, registration._instance)
+
+        if isinstance(registration, container._GenericRegistration):
+            return _PlanEntry(
+                _PlanEntry.GENERIC, keys, _Reference(registration.generic_type), _encode_scope(registration.scope_type))
+
+        raise PlanError("Registrations of type %s can't be described by a plan." % type(registration).__name__)
+
+    def to_registration(self, per_worker_instances):
+        registration = self._to_registration(per_worker_instances)
+        if self.decorators:
+            registration.decorators = tuple(decorator.load() for decorator in self.decorators)
+        return registration
+
+    def _to_registration(self, per_worker_instances):
+        if self.kind == _PlanEntry.CLASS:
+            # the argument types are known, so there's no need to inspect the constructor again
+            argument_types = {arg_name: _decode(arg_type) for (arg_name, arg_type) in self.argument_types.items()}
+            return container._ConstructorRegistration(
+                self.target.load(), container._new_scope(_decode_scope(self.scope_type)), argument_types)
+
+        if self.kind == _PlanEntry.CALLBACK:
+            return container._CallbackRegistration(
+                self.target.load(), container._new_scope(_decode_scope(self.scope_type)))
+
+        if self.kind == _PlanEntry.INSTANCE:
+            return container._InstanceRegistration(self.target)
+
+        if self.kind == _PlanEntry.PER_WORKER:
+            for key in self.keys:
+                key = _decode(key)
+                if key in per_worker_instances:
+                    return container._InstanceRegistration(per_worker_instances[key], per_worker=True)
+            raise PlanError("No per-worker instance was provided for %r." % (self.keys,))
+
+        return container._GenericRegistration(self.target.load(), _decode_scope(self.scope_type))
+
+
+class ContainerPlan(object):
+    """
+    A compact, picklable description of the registrations of a built container. Used to rebuild an equivalent
+    container in another process (e.g. a process pool worker) without running the container builder again.
+    Classes, scopes and callbacks are referenced by their qualified name, so must be importable by the worker.
+    Singletons are not included, each rebuilt container creates its own.
+    """
+    def __init__(self, entries):
+        """
+        :param entries: The registrations of the container.
+        """
+        self.entries = entries
+
+    @staticmethod
+    def from_container(component_container):
+        """
+        Describes the registrations of the given container.
+        :param component_container: The container to describe.
+        :return: The plan.
+        """
+        # keep registrations available as multiple types together, so they still share a scope once rebuilt
+        registrations = {}
+        for (key, registration) in component_container.registry_map.items():
+            # specializations will be closed again by the open generic
+            if isinstance(registration, container._ClosedGenericRegistration):
+                continue
+            registrations.setdefault(id(registration), (registration, []))[1].append(key)
+        for (key, registration) in component_container.generic_map.items():
+            registrations.setdefault(id(registration), (registration, []))[1].append(key)
+
+        return ContainerPlan([
+            _PlanEntry.from_registration(registration, keys) for (registration, keys) in registrations.values()])
+
+    def build(self, per_worker_instances=None):
+        """
+        Builds a new container from the plan.
+        :param per_worker_instances: Map of type -> instance, for instances registered with per_worker=True.
+        :return: A container
+        """
+        per_worker_instances = per_worker_instances or {}
+        registry_map = {}
+        generic_map = {}
+        for entry in self.entries:
+            registration = entry.to_registration(per_worker_instances)
+            registry = generic_map if entry.kind == _PlanEntry.GENERIC else registry_map
+            for key in entry.keys:
+                registry[_decode(key)] = registration
+
+        return container.Container(registry_map, generic_map)
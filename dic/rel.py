@@ -1,5 +1,6 @@
 import abc
 import threading
+from . import scope
 
 
 class Relationship(metaclass=abc.ABCMeta):
@@ -15,12 +16,13 @@ class _ResolvedFactory(object):
     """
     Class that will be injected into components when they ask for a factory.
     """
-    def __init__(self, container, component_type):
+    def __init__(self, container, component_type, timeout):
         self._container = container
         self._component_type = component_type
+        self._timeout = timeout
 
     def __call__(self, *args, **kwargs):
-        return self._container.resolve(self._component_type, **kwargs)
+        return self._container.resolve(self._component_type, resolve_timeout=self._timeout, **kwargs)
 
 
 class Factory(Relationship):
@@ -30,34 +32,49 @@ class Factory(Relationship):
 
     Overriding arguments can be provided.
     """
-    def __init__(self, component_type):
+    def __init__(self, component_type, timeout=None):
+        """
+        :param component_type: The type of the component to create.
+        :param timeout: The time in seconds each call may take, raising a dic.scope.ResolveTimeoutError if it takes
+        longer, or None for no limit.
+        """
         self.component_type = component_type
+        self.timeout = timeout
 
     def resolve(self, container):
-        return _ResolvedFactory(container, self.component_type)
+        return _ResolvedFactory(container, self.component_type, self.timeout)
 
 
 class _ResolvedLazy(object):
     """
     Class that will be injected into components when they ask for a lazy.
     """
-    def __init__(self, container, component_type):
+    def __init__(self, container, component_type, timeout):
         self._container = container
         self._component = None
         self._component_type = component_type
+        self._timeout = timeout
         self._lock = threading.Lock()
 
     @property
     def has_value(self):
-        with self._lock:
-            return self._component is not None
+        return self._component is not None
 
     @property
     def value(self):
-        with self._lock:
-            if self._component is None:
-                self._component = self._container.resolve(self._component_type)
-            return self._component
+        # only lock until the component has been resolved
+        component = self._component
+        if component is None:
+            # the timeout covers waiting on another thread resolving it too
+            with scope._Deadline(self._timeout):
+                scope._acquire(self._lock)
+                try:
+                    if self._component is None:
+                        self._component = self._container.resolve(self._component_type)
+                    component = self._component
+                finally:
+                    self._lock.release()
+        return component
 
 
 class Lazy(Relationship):
@@ -65,9 +82,213 @@ class Lazy(Relationship):
     Models a lazy relationship. Dependency lookup is delayed until the value is resolved for the first time.
     Lazy is thread-safe, so only one instance will be resolved if two threads ask at the same time.
     """
-    def __init__(self, component_type):
+    def __init__(self, component_type, timeout=None):
+        """
+        :param component_type: The type of the component to resolve.
+        :param timeout: The time in seconds resolving the value may take, raising a dic.scope.ResolveTimeoutError if
+        it takes longer (and trying again next time), or None for no limit.
+        """
+        self.component_type = component_type
+        self.timeout = timeout
+
+    def resolve(self, container):
+        return _ResolvedLazy(container, self.component_type, self.timeout)
+
+
+class _ResolvedAsyncLazy(object):
+    """
+    Class that will be injected into components when they ask for an async lazy.
+    """
+    def __init__(self, container, component_type, in_thread):
+        self._container = container
+        self._component = None
         self._component_type = component_type
+        self._in_thread = in_thread
+        # the task creating the component, shared by everything awaiting it
+        self._task = None
+
+    @property
+    def has_value(self):
+        return self._component is not None
+
+    async def get(self):
+        """
+        Gets the component, creating it on the first call. Concurrent calls wait for the same creation.
+        :return: The component.
+        """
+        component = self._component
+        if component is not None:
+            return component
+
+        import asyncio
+
+        task = self._task
+        if task is None or task.cancelled():
+            task = self._task = asyncio.ensure_future(self._create())
+        # cancelling one caller mustn't cancel the creation the others are waiting for
+        return await asyncio.shield(task)
+
+    async def _create(self):
+        import asyncio
+        import inspect
+
+        try:
+            if self._in_thread:
+                component = await asyncio.get_running_loop().run_in_executor(
+                    None, self._container.resolve, self._component_type)
+            else:
+                component = self._container.resolve(self._component_type)
+
+            # e.g. registered via an async callback
+            if inspect.isawaitable(component):
+                component = await component
+        except BaseException:
+            # don't keep the failure (or cancellation), so the next call tries again
+            self._task = None
+            raise
+
+        self._component = component
+        return component
+
+
+class AsyncLazy(Relationship):
+    """
+    Models a lazy relationship for asyncio, where the component is created by the first `await lazy.get()` rather
+    than when injected. Concurrent callers share the same creation, and a failed or cancelled creation is tried
+    again by the next call. If the component is registered via an async callback, the result is awaited.
+    An async lazy is bound to the event loop it's first used in.
+    """
+    def __init__(self, component_type, in_thread=False):
+        """
+        :param component_type: The type of the component.
+        :param in_thread: Whether to resolve the component on a thread of the event loop's default executor, so a
+        slow synchronous creation doesn't block the event loop.
+        """
+        self.component_type = component_type
+        self.in_thread = in_thread
+
+    def resolve(self, container):
+        return _ResolvedAsyncLazy(container, self.component_type, self.in_thread)
+
+
+class Index(Relationship):
+    """
+    Models an index of the components registered with a key for the given type, e.g. via
+    ContainerBuilder.register_class(..., key=...). Resolves to a read-only map of key -> function to create the
+    component registered with that key (respecting its scope), e.g. to dispatch messages to a handler per message type.
+    The creators of all of the keyed components are compiled once, when the index is first resolved.
+
+    Overriding arguments can be provided.
+    """
+    def __init__(self, component_type):
+        self.component_type = component_type
 
     def resolve(self, container):
-        return _ResolvedLazy(container, self._component_type)
+        return container._index(self.component_type)
+
+
+class _ResolvedProxy(object):
+    """
+    Class that will be injected into components when they ask for a proxy. Stands in for the component, which is
+    resolved on first use. Once resolved, attribute access is forwarded without taking the lock.
+    Comparisons, hashing and ``isinstance`` checks are forwarded to the component as well.
+    """
+    __slots__ = ('_container', '_component', '_component_type', '_lock')
+
+    def __init__(self, container, component_type):
+        object.__setattr__(self, '_container', container)
+        object.__setattr__(self, '_component', None)
+        object.__setattr__(self, '_component_type', component_type)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _get_component(self):
+        component = self._component
+        if component is None:
+            with self._lock:
+                if self._component is None:
+                    object.__setattr__(self, '_component', self._container.resolve(self._component_type))
+                component = self._component
+        return component
+
+    def __getattr__(self, name):
+        return getattr(self._get_component(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_component(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._get_component(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._get_component()(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._get_component())
+
+    def __len__(self):
+        return len(self._get_component())
+
+    def __contains__(self, item):
+        return item in self._get_component()
+
+    def __getitem__(self, key):
+        return self._get_component()[key]
+
+    def __setitem__(self, key, value):
+        self._get_component()[key] = value
 
+    def __bool__(self):
+        return bool(self._get_component())
+
+    def __enter__(self):
+        return self._get_component().__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._get_component().__exit__(exc_type, exc_value, traceback)
+
+    def __eq__(self, other):
+        return self._get_component() == other
+
+    def __ne__(self, other):
+        return self._get_component() != other
+
+    def __lt__(self, other):
+        return self._get_component() < other
+
+    def __le__(self, other):
+        return self._get_component() <= other
+
+    def __gt__(self, other):
+        return self._get_component() > other
+
+    def __ge__(self, other):
+        return self._get_component() >= other
+
+    def __hash__(self):
+        return hash(self._get_component())
+
+    @property
+    def __class__(self):
+        return type(self._get_component())
+
+    def __str__(self):
+        return str(self._get_component())
+
+    def __repr__(self):
+        if self._component is None:
+            return '<unresolved proxy for %r>' % (self._component_type,)
+        return repr(self._component)
+
+
+class Proxy(Relationship):
+    """
+    Models a transparent lazy relationship. A proxy is injected in place of the component, and the component is
+    resolved when the proxy is first used (e.g. an attribute is accessed). Unlike Lazy, consumers don't need to call
+    .value, so the dependency can be used as if it was injected directly.
+    Proxy is thread-safe, so only one instance will be resolved if two threads use it at the same time.
+    """
+    def __init__(self, component_type):
+        self.component_type = component_type
+
+    def resolve(self, container):
+        return _ResolvedProxy(container, self.component_type)
@@ -1,10 +1,19 @@
 import abc
+import itertools
+import os
+import threading
+import time
+import weakref
 
 
 class Scope(metaclass=abc.ABCMeta):
     """
     Controls the lifetime scope of a component registration.
     """
+    # Whether instances created in this scope are owned (and so disposed) by the container. Scopes that hand each
+    # instance straight to the caller should set this to False.
+    owns_instances = True
+
     @abc.abstractmethod
     def instance(self, create_function):
         """
@@ -14,20 +23,347 @@ class Scope(metaclass=abc.ABCMeta):
         """
         pass
 
+    def new(self):
+        """
+        Creates a new scope configured like this one, but without any instances.
+        :return: The new scope.
+        """
+        return type(self)()
+
+
+class ResolveTimeoutError(TimeoutError):
+    """
+    Raised when a resolve didn't finish within its timeout. Whatever was being created when it timed out is discarded,
+    so no half-built instance is left in a scope.
+    """
+    pass
+
+
+# the deadline (as time.monotonic()) of the resolve running on each thread, if it has a timeout
+_deadlines = threading.local()
+
+
+class _Deadline(object):
+    """
+    Sets the deadline of the resolve running on this thread, for the duration of a with statement. A nested resolve
+    can't extend the deadline of the resolve it's part of, only shorten it.
+    """
+    def __init__(self, timeout):
+        """
+        :param timeout: The time in seconds from now, or None for no deadline.
+        """
+        self._timeout = timeout
+
+    def __enter__(self):
+        self._previous = getattr(_deadlines, 'deadline', None)
+        if self._timeout is not None:
+            deadline = time.monotonic() + self._timeout
+            if self._previous is None or deadline < self._previous:
+                _deadlines.deadline = deadline
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _deadlines.deadline = self._previous
+
+
+def _remaining():
+    """
+    :return: The time in seconds left before the deadline of the resolve running on this thread, or None if it has no
+    deadline.
+    """
+    deadline = getattr(_deadlines, 'deadline', None)
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _acquire(lock):
+    """
+    Acquires the lock, waiting no longer than the deadline of the resolve running on this thread.
+    :raises ResolveTimeoutError: If the lock couldn't be acquired in time.
+    """
+    remaining = _remaining()
+    if remaining is None:
+        lock.acquire()
+    elif not lock.acquire(timeout=max(remaining, 0)):
+        raise ResolveTimeoutError("Timed out waiting for another thread to create the component.")
+
 
 class InstancePerDependency(Scope):
     """
     Creates an instance per dependency
     """
+    owns_instances = False
+
     def instance(self, create_function):
         return create_function()
 
 
 class SingleInstance(Scope):
+    """
+    Creates a single instance, the first time it's needed.
+    Once created, the instance is read without locking. Only creating the instance is locked, and the lock is per
+    scope, so singletons can be created by different threads at the same time.
+    """
     def __init__(self):
         self.component_instance = None
+        # re-entrant, as creating the instance may resolve the component again via a factory
+        self._lock = threading.RLock()
+        _locking_scopes.add(self)
 
     def instance(self, create_function):
-        if self.component_instance is None:
-            self.component_instance = create_function()
-        return self.component_instance
+        component_instance = self.component_instance
+        if component_instance is None:
+            _acquire(self._lock)
+            try:
+                if self.component_instance is None:
+                    self.component_instance = create_function()
+                component_instance = self.component_instance
+            finally:
+                self._lock.release()
+        return component_instance
+
+    def _after_fork_in_child(self):
+        # the lock may have been held by another thread in the parent, which doesn't exist in the child
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        # copies (e.g. when building a container) need their own lock
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+        _locking_scopes.add(self)
+
+
+class SingleInstancePerProcess(SingleInstance):
+    """
+    Models a 'singleton' per process. Behaves like SingleInstance, but the instance is forgotten in a forked child
+    process so a new one is created there, e.g. for components holding sockets that can't be shared with a parent.
+    """
+    def _after_fork_in_child(self):
+        super()._after_fork_in_child()
+        self.component_instance = None
+
+
+class Sharded(Scope):
+    """
+    Keeps a number of instances (shards) of a component, rather than a single instance, handing them out by thread or
+    round-robin. E.g. for counters, ID generators or buffered writers that would be contended if shared by every
+    thread as a SingleInstance. Each shard is created the first time it's needed, and their state can be combined via
+    aggregate().
+    """
+    THREAD = 'thread'
+    ROUND_ROBIN = 'round_robin'
+
+    def __init__(self, shards=None, strategy=THREAD, aggregate=None):
+        """
+        :param shards: The number of instances to keep, defaults to the number of CPUs.
+        :param strategy: How to pick the instance for each resolve: Sharded.THREAD gives each thread the same instance
+        every time (threads are spread over the shards in the order they first resolve), Sharded.ROUND_ROBIN picks
+        the next instance on each resolve.
+        :param aggregate: The default function to combine the instances with in aggregate(), of the form
+        fn(instances).
+        """
+        if strategy not in (Sharded.THREAD, Sharded.ROUND_ROBIN):
+            raise ValueError("Unknown sharding strategy %r." % (strategy,))
+        self.shards = shards or os.cpu_count() or 1
+        self.strategy = strategy
+        self._aggregate = aggregate
+        self._instances = [None] * self.shards
+        self._reset()
+        _locking_scopes.add(self)
+
+    def _reset(self):
+        # a lock per shard, so shards can be created at the same time
+        self._locks = [threading.RLock() for i in range(self.shards)]
+        # next() of a count is atomic, so needs no lock
+        self._next_shard = itertools.count()
+        self._thread_shard = threading.local()
+
+    def _shard(self):
+        if self.strategy == Sharded.ROUND_ROBIN:
+            return next(self._next_shard) % self.shards
+
+        shard = getattr(self._thread_shard, 'shard', None)
+        if shard is None:
+            shard = self._thread_shard.shard = next(self._next_shard) % self.shards
+        return shard
+
+    def instance(self, create_function):
+        shard = self._shard()
+        component_instance = self._instances[shard]
+        if component_instance is None:
+            lock = self._locks[shard]
+            _acquire(lock)
+            try:
+                if self._instances[shard] is None:
+                    self._instances[shard] = create_function()
+                component_instance = self._instances[shard]
+            finally:
+                lock.release()
+        return component_instance
+
+    def instances(self):
+        """
+        :return: The instances created so far.
+        """
+        return [component_instance for component_instance in self._instances if component_instance is not None]
+
+    def aggregate(self, combine=None):
+        """
+        Combines the state of the instances, e.g. summing counters.
+        :param combine: Function of the form fn(instances), defaults to the aggregate function given to the scope.
+        :return: The result of the function.
+        """
+        combine = combine or self._aggregate
+        if combine is None:
+            raise ValueError("No function was given to aggregate the instances with.")
+        return combine(self.instances())
+
+    def new(self):
+        return Sharded(self.shards, self.strategy, self._aggregate)
+
+    def _after_fork_in_child(self):
+        # the locks may have been held by another thread in the parent, which doesn't exist in the child
+        self._reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_locks', '_next_shard', '_thread_shard'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        # copies (e.g. when building a container) need their own locks
+        self.__dict__.update(state)
+        self._reset()
+        _locking_scopes.add(self)
+
+
+class ConcurrencyLimitError(TimeoutError):
+    """
+    Raised when a component couldn't be created as too many were already being created, and none finished in time.
+    """
+    pass
+
+
+class Limited(Scope):
+    """
+    Limits how many instances of a component are created at once, e.g. so a burst of resolves of a component that's
+    expensive to create doesn't overwhelm whatever it connects to. Creations beyond the limit wait their turn, and can
+    be rejected if they wait too long. Instances are otherwise kept by the wrapped scope, so e.g. only the creation of
+    a SingleInstance is limited, not reading it once created.
+    Note that a component that resolves itself while being created (e.g. via a Factory) needs a limit above 1.
+    """
+    def __init__(self, max_concurrent=1, scope_type=InstancePerDependency, timeout=None):
+        """
+        :param max_concurrent: The maximum number of instances to create at once.
+        :param scope_type: The type of scope to keep the instances in, defaults to instance per dependency.
+        :param timeout: The time in seconds a creation can wait its turn before being rejected with a
+        ConcurrencyLimitError, or None to wait forever.
+        """
+        self.max_concurrent = max_concurrent
+        self.scope = scope_type()
+        self.timeout = timeout
+        self._reset()
+        _locking_scopes.add(self)
+
+    def _reset(self):
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrent)
+        # held while updating the metrics
+        self._metrics_lock = threading.Lock()
+        self._created = 0
+        self._rejected = 0
+        self._waiting = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @property
+    def owns_instances(self):
+        return self.scope.owns_instances
+
+    def instance(self, create_function):
+        return self.scope.instance(lambda: self._create(create_function))
+
+    def _create(self, create_function):
+        start = time.monotonic()
+        with self._metrics_lock:
+            self._waiting += 1
+        # wait no longer than the deadline of the resolve either
+        timeout = self.timeout
+        remaining = _remaining()
+        deadline_first = remaining is not None and (timeout is None or remaining < timeout)
+        if deadline_first:
+            timeout = max(remaining, 0)
+        acquired = self._semaphore.acquire(timeout=timeout) if timeout is not None else self._semaphore.acquire()
+        wait_time = time.monotonic() - start
+        with self._metrics_lock:
+            self._waiting -= 1
+            self._total_wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+            if acquired:
+                self._created += 1
+            else:
+                self._rejected += 1
+
+        if not acquired:
+            if deadline_first:
+                raise ResolveTimeoutError("Timed out waiting %.3fs for %d other creations of the component." % (
+                    wait_time, self.max_concurrent))
+            raise ConcurrencyLimitError(
+                "Waited %.3fs to create a component, but %d were already being created." % (
+                    wait_time, self.max_concurrent))
+
+        try:
+            return create_function()
+        finally:
+            self._semaphore.release()
+
+    def metrics(self):
+        """
+        :return: The metrics of the scope as structured data: the number of instances 'created', creations
+        'rejected' and currently 'waiting', and the 'average_wait_time' and 'max_wait_time' in seconds.
+        """
+        with self._metrics_lock:
+            waited = self._created + self._rejected
+            return {
+                'created': self._created,
+                'rejected': self._rejected,
+                'waiting': self._waiting,
+                'average_wait_time': self._total_wait_time / waited if waited else 0.0,
+                'max_wait_time': self._max_wait_time,
+            }
+
+    def new(self):
+        return Limited(self.max_concurrent, type(self.scope), self.timeout)
+
+    def _after_fork_in_child(self):
+        # threads holding or waiting on the semaphore in the parent don't exist in the child
+        self._reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_semaphore', '_metrics_lock'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        # copies (e.g. when building a container) need their own semaphore, and start without any metrics
+        self.__dict__.update(state)
+        self._reset()
+        _locking_scopes.add(self)
+
+
+# scopes to reset in a forked child process
+_locking_scopes = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for locking_scope in list(_locking_scopes):
+        locking_scope._after_fork_in_child()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
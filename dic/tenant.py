@@ -0,0 +1,163 @@
+import collections
+import threading
+import time
+from . import container
+
+
+class TenantContainers(object):
+    """
+    A cache of containers per tenant, each derived from a root container with only the tenant's own registrations.
+    Everything that doesn't depend on a tenant's registrations (including singletons) is shared with the root
+    container, so a tenant only costs as much as its differences. Tenants that haven't been used recently are evicted
+    and their containers disposed.
+    """
+    def __init__(self, root, configure, max_tenants=None, idle_timeout=None, dispose_timeout=None):
+        """
+        :param root: The container with the registrations shared by all tenants.
+        :param configure: Function of the form fn(tenant, builder), registering the tenant's own components (and
+        decorators) with the given dic.container.ContainerBuilder. Open generics can't be registered per tenant.
+        :param max_tenants: The maximum number of tenant containers to keep, evicting the least recently used first.
+        Defaults to no limit.
+        :param idle_timeout: The time in seconds after which a tenant container that hasn't been used is evicted.
+        Defaults to never.
+        :param dispose_timeout: The time in seconds to wait for each component of an evicted container to dispose.
+        """
+        self.root = root
+        self._configure = configure
+        self.max_tenants = max_tenants
+        self.idle_timeout = idle_timeout
+        self.dispose_timeout = dispose_timeout
+        # tenant -> [container, last used], least recently used first
+        self._tenants = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, tenant):
+        """
+        Gets the container of the tenant, deriving it from the root container if it's not cached.
+        :param tenant: The tenant, e.g. its ID.
+        :return: The tenant's container.
+        :raises TypeError: If the tenant's configuration registers an open generic.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tenants.get(tenant)
+            if entry is not None:
+                self._hits += 1
+                entry[1] = now
+                self._tenants.move_to_end(tenant)
+                evicted = self._take_evicted(now)
+            else:
+                self._misses += 1
+
+        if entry is None:
+            # configure outside of the lock, so other tenants aren't blocked meanwhile
+            builder = container.ContainerBuilder()
+            self._configure(tenant, builder)
+            if builder.generic_registry:
+                # derived containers resolve open generics via the root container
+                raise TypeError("Tenants can't register open generics, register them with the root container.")
+            registrations = dict(builder.registry)
+            builder._decorate(registrations, self.root._snapshot.registry_map)
+            tenant_container = self.root.with_overrides(registrations)
+
+            with self._lock:
+                # another thread may have got there first, in which case nothing has been created with ours yet
+                entry = self._tenants.setdefault(tenant, [tenant_container, now])
+                entry[1] = now
+                self._tenants.move_to_end(tenant)
+                evicted = self._take_evicted(now)
+
+        self._dispose(evicted)
+        return entry[0]
+
+    def evict(self, tenant):
+        """
+        Evicts the tenant's container, if cached, and disposes it. E.g. when the tenant's configuration changes.
+        :param tenant: The tenant.
+        """
+        with self._lock:
+            entry = self._tenants.pop(tenant, None)
+            if entry is not None:
+                self._evictions += 1
+        if entry is not None:
+            self._dispose([(tenant, entry[0])])
+
+    def evict_idle(self):
+        """
+        Evicts and disposes the containers of tenants that have been idle for longer than the idle timeout. Idle
+        tenants are also evicted by get(), so this is only needed when the cache isn't otherwise used.
+        """
+        with self._lock:
+            evicted = self._take_evicted(time.monotonic())
+        self._dispose(evicted)
+
+    def dispose(self):
+        """
+        Evicts and disposes the containers of all tenants. The root container isn't disposed.
+        """
+        with self._lock:
+            evicted = [(tenant, entry[0]) for (tenant, entry) in self._tenants.items()]
+            self._evictions += len(evicted)
+            self._tenants.clear()
+        self._dispose(evicted)
+
+    def stats(self):
+        """
+        :return: Statistics of the cache as structured data: the number of 'tenants' cached, 'hits', 'misses',
+        'evictions' and the 'hit_rate', and the 'local_creators' and 'owned_instances' of the cached tenant containers,
+        i.e. what each tenant costs in memory beyond what it shares with the root container.
+        """
+        with self._lock:
+            tenant_containers = [entry[0] for entry in self._tenants.values()]
+            hits, misses, evictions = self._hits, self._misses, self._evictions
+
+        return {
+            'tenants': len(tenant_containers),
+            'hits': hits,
+            'misses': misses,
+            'evictions': evictions,
+            'hit_rate': hits / (hits + misses) if hits or misses else 0.0,
+            'local_creators': sum(
+                1 for tenant_container in tenant_containers for creator in
+                list(tenant_container._snapshot.creators.values()) if getattr(creator, 'container', None) is
+                tenant_container),
+            'owned_instances': sum(len(tenant_container._owned) for tenant_container in tenant_containers),
+        }
+
+    def __len__(self):
+        return len(self._tenants)
+
+    def __contains__(self, tenant):
+        return tenant in self._tenants
+
+    def _take_evicted(self, now):
+        """
+        Removes the tenants to evict, which must be done holding the lock.
+        :return: List of (tenant, container) evicted, to dispose once the lock is released.
+        """
+        evicted = []
+        while self._tenants:
+            tenant, (tenant_container, last_used) = next(iter(self._tenants.items()))
+            over_limit = self.max_tenants is not None and len(self._tenants) > self.max_tenants
+            idle = self.idle_timeout is not None and now - last_used > self.idle_timeout
+            if not over_limit and not idle:
+                # the rest were used more recently
+                break
+            del self._tenants[tenant]
+            evicted.append((tenant, tenant_container))
+
+        self._evictions += len(evicted)
+        return evicted
+
+    def _dispose(self, evicted):
+        for (tenant, tenant_container) in evicted:
+            try:
+                tenant_container.dispose(timeout=self.dispose_timeout)
+            except container.DisposalError:
+                import logging
+
+                # the tenant has already been evicted, so there's no one better to tell
+                logging.getLogger(__name__).exception("Failed to dispose the container of tenant %r", tenant)
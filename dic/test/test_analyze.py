@@ -0,0 +1,137 @@
+import contextlib
+import dic
+import dic.analyze
+import io
+import json
+import unittest
+
+
+class Standalone(object):
+    pass
+
+
+class SimpleComponent(object):
+    def __init__(self, s: Standalone):
+        self.standalone = s
+
+
+class Service(object):
+    def __init__(self, s: Standalone, c: SimpleComponent, factory: dic.rel.Factory(SimpleComponent)):
+        pass
+
+
+class Broken(object):
+    def __init__(self, missing: 'Missing'):
+        pass
+
+
+class ServiceModule(dic.container.Module):
+    def load(self, builder):
+        builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        builder.register_class(SimpleComponent)
+        builder.register_class(Service)
+
+
+builder = dic.container.ContainerBuilder()
+builder.register_module(ServiceModule())
+
+
+class DependencyGraphTestCase(unittest.TestCase):
+    def setUp(self):
+        self.graph = dic.analyze.DependencyGraph.from_builder(builder)
+
+    def test_stats(self):
+        # Arrange
+        # Act
+        stats = self.graph.stats()
+
+        # Assert
+        self.assertEqual(3, stats['nodes'])
+        self.assertEqual(4, stats['edges'])
+        self.assertEqual(3, stats['max_depth'])
+        self.assertEqual({'SingleInstance': 1, 'InstancePerDependency': 2}, stats['scopes'])
+        self.assertEqual(__name__ + '.Service', stats['fan_out'][0]['type'])
+        self.assertEqual(3, stats['fan_out'][0]['count'])
+
+    def test_instances_per_resolve_excludes_singletons_and_relationships(self):
+        # Arrange
+        # Act
+        instances = self.graph.stats()['instances_per_resolve']
+
+        # Assert
+        self.assertEqual([
+            {'type': __name__ + '.Service', 'count': 2},
+            {'type': __name__ + '.SimpleComponent', 'count': 1},
+        ], instances)
+
+    def test_instances_per_resolve_excludes_singleton_dependencies(self):
+        # Arrange
+        singleton_builder = dic.container.ContainerBuilder()
+        singleton_builder.register_class(Standalone)
+        singleton_builder.register_class(SimpleComponent, component_scope=dic.scope.SingleInstance)
+        singleton_builder.register_class(Service)
+        graph = dic.analyze.DependencyGraph.from_builder(singleton_builder)
+
+        # Act
+        instances = graph.stats()['instances_per_resolve']
+
+        # Assert
+        # Service and its own Standalone, but not the Standalone of the existing SimpleComponent
+        self.assertEqual([
+            {'type': __name__ + '.Service', 'count': 2},
+            {'type': __name__ + '.Standalone', 'count': 1},
+        ], instances)
+
+    def test_missing_registrations(self):
+        # Arrange
+        broken = dic.container.ContainerBuilder()
+        broken.register_class(Broken)
+
+        # Act
+        stats = dic.analyze.DependencyGraph.from_builder(broken).stats()
+
+        # Assert
+        self.assertEqual(["'Missing'"], stats['missing'])
+
+    def test_to_dot(self):
+        # Arrange
+        # Act
+        dot = self.graph.to_dot()
+
+        # Assert
+        self.assertTrue(dot.startswith('digraph dic {'))
+        self.assertIn('"%s.Service" -> "%s.SimpleComponent" [label="factory (Factory)", style=dashed];' % (
+            __name__, __name__), dot)
+
+
+class MainTestCase(unittest.TestCase):
+    def run_main(self, *argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            dic.analyze.main(list(argv))
+        return output.getvalue()
+
+    def test_builder_json(self):
+        # Arrange
+        # Act
+        document = json.loads(self.run_main(__name__ + ':builder', '--format', 'json'))
+
+        # Assert
+        self.assertEqual(3, document['stats']['nodes'])
+        self.assertEqual(3, len(document['nodes']))
+
+    def test_module_class_text(self):
+        # Arrange
+        # Act
+        report = self.run_main(__name__ + ':ServiceModule')
+
+        # Assert
+        self.assertIn('Nodes: 3', report)
+        self.assertIn('Max depth: 3', report)
+
+    def test_not_a_builder(self):
+        # Arrange
+        # Act
+        # Assert
+        with self.assertRaises(TypeError):
+            dic.analyze.load(__name__ + ':Standalone')
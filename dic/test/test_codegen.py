@@ -0,0 +1,155 @@
+import asyncio
+import dic
+import dic.codegen
+import types
+import unittest
+
+
+class Standalone(object):
+    pass
+
+
+class SimpleComponent(object):
+    def __init__(self, s: Standalone, factory: dic.rel.Factory(Standalone), lazy: dic.rel.Lazy(Standalone)):
+        self.standalone = s
+        self.factory = factory
+        self.lazy = lazy
+
+
+class Settings(object):
+    def __init__(self, name):
+        self.name = name
+
+
+def create_settings(s: Standalone):
+    return Settings('from callback')
+
+
+def create_settings_with_context(component_context):
+    return Settings(type(component_context.resolve(Standalone)).__name__)
+
+
+async def connect(s: Standalone):
+    return Settings('connected')
+
+
+def rename(settings):
+    settings.name += ' (decorated)'
+    return settings
+
+
+class LambdaModule(dic.container.Module):
+    def load(self, builder):
+        builder.register_callback(Settings, lambda: Settings('lambda'))
+
+
+class CodegenTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(SimpleComponent)
+
+    def load(self, container):
+        generated = types.ModuleType('generated_wiring')
+        exec(dic.codegen.generate(container), generated.__dict__)
+        return generated
+
+    def test_generated_resolves_registrations(self):
+        # Arrange
+        generated = self.load(self.builder.build())
+
+        # Act
+        component = generated.resolve_SimpleComponent()
+
+        # Assert
+        self.assertIsInstance(component, SimpleComponent)
+        self.assertIs(component.standalone, generated.resolve(Standalone))
+        self.assertIs(component.standalone, component.factory())
+        self.assertIs(component.standalone, component.lazy.value)
+        self.assertIsNot(component, generated.resolve(SimpleComponent))
+
+    def test_generated_overriding_arguments(self):
+        # Arrange
+        standalone = Standalone()
+        generated = self.load(self.builder.build())
+
+        # Act
+        component = generated.resolve(SimpleComponent, s=standalone)
+
+        # Assert
+        self.assertIs(standalone, component.standalone)
+
+    def test_generated_callbacks_and_decorators(self):
+        # Arrange
+        self.builder.register_callback(Settings, create_settings, key='injected')
+        self.builder.register_callback(Settings, create_settings_with_context, key='context')
+        self.builder.register_decorator((Settings, 'injected'), rename)
+        generated = self.load(self.builder.build())
+
+        # Act
+        injected = generated.resolve((Settings, 'injected'))
+        context = generated.resolve((Settings, 'context'))
+
+        # Assert
+        self.assertEqual('from callback (decorated)', injected.name)
+        self.assertEqual('Standalone', context.name)
+
+    def test_generated_async_singleton(self):
+        # Arrange
+        self.builder.register_callback(Settings, connect, component_scope=dic.scope.SingleInstance)
+        generated = self.load(self.builder.build())
+
+        async def resolve_twice():
+            return [await generated.resolve(Settings), await generated.resolve(Settings)]
+
+        # Act
+        first, second = asyncio.run(resolve_twice())
+
+        # Assert
+        self.assertEqual('connected', first.name)
+        self.assertIs(first, second)
+
+    def test_generated_provided_instances(self):
+        # Arrange
+        settings = Settings('instance')
+        self.builder.register_instance(Settings, settings)
+        generated = self.load(self.builder.build())
+
+        # Act
+        generated.provide(Settings, settings)
+
+        # Assert
+        self.assertIs(settings, generated.resolve(Settings))
+
+    def test_check_detects_drift(self):
+        # Arrange
+        generated = self.load(self.builder.build())
+        dic.codegen.check(generated, self.builder.build())
+        self.builder.register_class(Standalone)
+
+        # Act
+        # Assert
+        with self.assertRaises(dic.codegen.CodegenError):
+            dic.codegen.check(generated, self.builder.build())
+
+    def test_lambda_callbacks_cant_be_generated(self):
+        # Arrange
+        self.builder.register_callback(Settings, lambda: Settings('lambda'))
+
+        # Act
+        # Assert
+        with self.assertRaises(dic.codegen.CodegenError):
+            dic.codegen.generate(self.builder.build())
+
+
+    def test_main_reports_registrations_that_cant_be_generated(self):
+        # Arrange
+        # Act
+        with self.assertRaises(SystemExit) as raised:
+            dic.codegen.main([__name__ + ':LambdaModule'])
+
+        # Assert
+        self.assertIn("can't be referenced by name", str(raised.exception.code))
+
+if __name__ == '__main__':
+    unittest.main()
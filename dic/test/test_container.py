@@ -1,8 +1,13 @@
+import asyncio
 import dic
+import os
 import threading
 import time
+import typing
 import unittest
 
+T = typing.TypeVar('T')
+
 
 class Standalone(object):
     pass
@@ -17,6 +22,67 @@ class SimpleComponent(object):
         self.standalone = s
 
 
+class User(object):
+    pass
+
+
+class Order(object):
+    pass
+
+
+class Repository(typing.Generic[T]):
+    pass
+
+
+class Serializer(typing.Generic[T]):
+    pass
+
+
+class SqlRepository(Repository[T]):
+    def __init__(self, standalone: Standalone, serializer: Serializer[T]):
+        self.standalone = standalone
+        self.serializer = serializer
+
+
+class Resource(object):
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class UsesResource(object):
+    def __init__(self, resource: Resource):
+        self.resource = resource
+        self.resource_open_on_close = None
+
+    def close(self):
+        self.resource_open_on_close = not self.resource.closed.is_set()
+
+
+class LazyResource(object):
+    def __init__(self, resource: dic.rel.Lazy(Resource)):
+        self.resource = resource
+
+
+class AsyncResource(object):
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+class AsyncClient(object):
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        await asyncio.sleep(0)
+        self.closed = True
+
+
 class SimpleModule(dic.container.Module):
     def load(self, builder):
         builder.register_class(Standalone)
@@ -267,6 +333,83 @@ class ContainerTestCase(unittest.TestCase):
         self.assertIsNot(component1, component2)
         self.assertIs(component1.standalone, component2.standalone)
 
+    def test_resolve_callback_with_injected_parameters(self):
+        # Arrange
+        standalone = Standalone()
+        self.builder.register_instance(Standalone, standalone)
+        self.builder.register_callback(User, lambda: User())
+
+        def create(s: Standalone, factory: dic.rel.Factory(User), name='x'):
+            return SimpleComponent(s), factory(), name
+
+        self.builder.register_callback(tuple, create)
+        container = self.builder.build()
+
+        # Act
+        component, user, name = container.resolve(tuple)
+
+        # Assert
+        self.assertEqual(['s', 'factory'], list(container.registry_map[tuple].argument_types))
+        self.assertIs(component.standalone, standalone)
+        self.assertIsInstance(user, User)
+        self.assertEqual('x', name)
+
+    def test_resolve_callback_with_overriding_argument(self):
+        # Arrange
+        def create(s: Standalone):
+            return SimpleComponent(s)
+
+        standalone = Standalone()
+        self.builder.register_callback(SimpleComponent, create)
+        container = self.builder.build()
+
+        # Act
+        component = container.resolve(SimpleComponent, s=standalone)
+
+        # Assert
+        self.assertIs(component.standalone, standalone)
+
+    def test_resolve_async_callback_per_dependency(self):
+        # Arrange
+        async def create(s: Standalone):
+            return SimpleComponent(s)
+
+        self.builder.register_class(Standalone)
+        self.builder.register_callback(SimpleComponent, create)
+        container = self.builder.build()
+
+        # Act
+        component = asyncio.run(container.resolve(SimpleComponent))
+        task_component = asyncio.run(self.run_task(container.resolve(SimpleComponent)))
+
+        # Assert
+        self.assertIsInstance(component, SimpleComponent)
+        self.assertIsInstance(task_component, SimpleComponent)
+
+    async def run_task(self, coroutine):
+        return await asyncio.create_task(coroutine)
+
+    def test_resolve_async_callback_singleton_awaited_once(self):
+        # Arrange
+        created = []
+
+        async def create():
+            created.append(Standalone())
+            return created[-1]
+
+        self.builder.register_callback(Standalone, create, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+
+        async def resolve_twice():
+            return [await container.resolve(Standalone), await container.resolve(Standalone)]
+
+        # Act
+        first, second = asyncio.run(resolve_twice())
+
+        # Assert
+        self.assertEqual([first], created)
+        self.assertIs(first, second)
+
     def test_resolve_instance(self):
         # Arrange
         standalone = Standalone()
@@ -281,47 +424,983 @@ class ContainerTestCase(unittest.TestCase):
         self.assertIs(x, standalone)
         self.assertIs(y, standalone)
 
-    def test_resolve_thread_safe(self):
+    def test_resolve_single_instance_thread_safe(self):
         # Obviously can't test this 100%, but should be enough to see if
         # it has been done right-ish...
 
         # Arrange
         finish_first = threading.Event()
         did_first = threading.Event()
-        did_second = threading.Event()
-        expected_first = Standalone()
-        expected_second = Standalone()
+        created = []
         actual = [None, None]
 
-        # DODO THIS IS
         def resolve_standalone(component_context):
-            if actual[0] is None:
-                actual[0] = expected_first
-                did_first.set()
-                # This should cause the container to lock when resolving the second thing
-                finish_first.wait()
-            elif actual[1] is None:
-                actual[1] = expected_second
-                did_second.set()
+            created.append(Standalone())
+            did_first.set()
+            # This should cause other threads to wait for the instance
+            finish_first.wait(timeout=5)
+            return created[-1]
 
-        self.builder.register_callback(Standalone, resolve_standalone)
+        self.builder.register_callback(Standalone, resolve_standalone, component_scope=dic.scope.SingleInstance)
         container = self.builder.build()
 
+        def resolve(index):
+            actual[index] = container.resolve(Standalone)
+
         # Act/Assert
-        threading.Thread(target=container.resolve, args=(Standalone,)).start()
-        threading.Thread(target=container.resolve, args=(Standalone,)).start()
+        first = threading.Thread(target=resolve, args=(0,))
+        first.start()
+        did_first.wait(timeout=2)
+        second = threading.Thread(target=resolve, args=(1,))
+        second.start()
 
-        time.sleep(2)
-        self.assertTrue(did_first.is_set())
-        self.assertIs(expected_first, actual[0])
-        self.assertFalse(did_second.is_set())
+        time.sleep(0.5)
+        self.assertEqual(1, len(created))
+        self.assertIsNone(actual[1])
 
         # finish the first resolve
         finish_first.set()
 
-        # wait for the second resolve to finish
-        did_second.wait(timeout=2)
-        self.assertIs(expected_second, actual[1])
+        # wait for both resolves to finish
+        first.join(timeout=2)
+        second.join(timeout=2)
+        self.assertEqual(1, len(created))
+        self.assertIs(created[0], actual[0])
+        self.assertIs(created[0], actual[1])
+
+    def test_resolve_in_parallel(self):
+        # Arrange
+        finish_first = threading.Event()
+        did_first = threading.Event()
+        did_second = threading.Event()
+
+        def resolve_standalone(component_context):
+            if not did_first.is_set():
+                did_first.set()
+                # Resolves aren't serialized, so this shouldn't block the second resolve
+                finish_first.wait(timeout=5)
+            else:
+                did_second.set()
+            return Standalone()
+
+        self.builder.register_callback(Standalone, resolve_standalone)
+        container = self.builder.build()
+
+        # Act
+        first = threading.Thread(target=container.resolve, args=(Standalone,))
+        first.start()
+        did_first.wait(timeout=2)
+        container.resolve(Standalone)
+
+        # Assert
+        self.assertTrue(did_second.is_set())
+        self.assertFalse(finish_first.is_set())
+        finish_first.set()
+        first.join(timeout=2)
+
+    def test_resolve_many(self):
+        # Arrange
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(SimpleComponent)
+        container = self.builder.build()
+
+        # Act
+        component, standalone, factory = container.resolve_many(
+            [SimpleComponent, Standalone, dic.rel.Factory(SimpleComponent)])
+
+        # Assert
+        self.assertIsInstance(component, SimpleComponent)
+        self.assertIs(component.standalone, standalone)
+        self.assertIsInstance(factory(), SimpleComponent)
+
+    def test_resolve_map(self):
+        # Arrange
+        self.builder.register_class(Standalone)
+        self.builder.register_class(SimpleComponent)
+        container = self.builder.build()
+
+        # Act
+        components = container.resolve_map(iter([Standalone, SimpleComponent]))
+
+        # Assert
+        self.assertEqual([Standalone, SimpleComponent], list(components))
+        self.assertIsInstance(components[Standalone], Standalone)
+        self.assertIsInstance(components[SimpleComponent], SimpleComponent)
+
+    def test_resolve_many_concurrently(self):
+        # Arrange
+        # both roots need to be created at the same time to get past the barrier
+        barrier = threading.Barrier(2, timeout=2)
+
+        def create(component_type):
+            barrier.wait()
+            return component_type()
+
+        self.builder.register_callback(User, lambda: create(User))
+        self.builder.register_callback(Order, lambda: create(Order))
+        container = self.builder.build()
+
+        # Act
+        user, order = container.resolve_many([User, Order], max_workers=2)
+
+        # Assert
+        self.assertIsInstance(user, User)
+        self.assertIsInstance(order, Order)
+
+    def test_resolve_timeout_discards_slow_component(self):
+        # Arrange
+        created = []
+
+        def create():
+            time.sleep(0.05)
+            created.append(Resource())
+            return created[-1]
+
+        self.builder.register_callback(Resource, create, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(UsesResource)
+        container = self.builder.build()
+
+        # Act
+        with self.assertRaises(dic.scope.ResolveTimeoutError):
+            container.resolve(UsesResource, resolve_timeout=0.01)
+        resource = container.resolve(Resource, resolve_timeout=1)
+
+        # Assert
+        self.assertEqual(2, len(created))
+        self.assertTrue(created[0].closed.is_set())
+        self.assertIs(created[1], resource)
+
+    def test_timeout_overriding_argument(self):
+        # Arrange
+        class Client(object):
+            def __init__(self, timeout: int):
+                self.timeout = timeout
+
+        self.builder.register_class(Client)
+        container = self.builder.build()
+
+        # Act
+        client = container.resolve(Client, timeout=5)
+        factory_client = container.resolve(dic.rel.Factory(Client, timeout=1))(timeout=7)
+
+        # Assert
+        self.assertEqual(5, client.timeout)
+        self.assertEqual(7, factory_client.timeout)
+
+    def test_resolve_timeout_waiting_for_other_thread(self):
+        # Arrange
+        creating = threading.Event()
+        finish = threading.Event()
+
+        def create():
+            creating.set()
+            finish.wait(timeout=2)
+            return Standalone()
+
+        self.builder.register_callback(Standalone, create, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        first = threading.Thread(target=container.resolve, args=(Standalone,))
+        first.start()
+        creating.wait(timeout=2)
+
+        # Act
+        start = time.monotonic()
+        with self.assertRaises(dic.scope.ResolveTimeoutError):
+            container.resolve(Standalone, resolve_timeout=0.05)
+        waited = time.monotonic() - start
+        finish.set()
+        first.join(timeout=2)
+
+        # Assert
+        self.assertLess(waited, 1)
+        self.assertIsInstance(container.resolve(Standalone, resolve_timeout=0.05), Standalone)
+
+
+class DisposeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+
+    def test_dispose_closes_owned_instances(self):
+        # Arrange
+        self.builder.register_class(Resource, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(AsyncResource, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        resource = container.resolve(Resource)
+        async_resource = container.resolve(AsyncResource)
+
+        # Act
+        container.dispose()
+
+        # Assert
+        self.assertTrue(resource.closed.is_set())
+        self.assertTrue(async_resource.closed)
+
+    def test_dispose_awaits_async_close(self):
+        # Arrange
+        self.builder.register_class(AsyncClient, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        client = container.resolve(AsyncClient)
+
+        # Act
+        container.dispose()
+
+        # Assert
+        self.assertTrue(client.closed)
+
+    def test_dispose_in_reverse_dependency_order(self):
+        # Arrange
+        self.builder.register_class(Resource, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(UsesResource, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        uses_resource = container.resolve(UsesResource)
+
+        # Act
+        container.dispose()
+
+        # Assert
+        self.assertTrue(uses_resource.resource_open_on_close)
+        self.assertTrue(uses_resource.resource.closed.is_set())
+
+    def test_dispose_through_instance_per_dependency(self):
+        # Arrange
+        self.builder.register_class(Resource, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(SimpleComponent)
+        self.builder.register_callback(
+            Standalone, lambda c: c.resolve(Resource) and Standalone())
+        self.builder.register_callback(
+            UsesResource, lambda c: c.resolve(SimpleComponent) and UsesResource(c.resolve(Resource)),
+            component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        uses_resource = container.resolve(UsesResource)
+
+        # Act
+        container.dispose()
+
+        # Assert
+        self.assertTrue(uses_resource.resource_open_on_close)
+
+    def test_dispose_ignores_unowned_instances(self):
+        # Arrange
+        resource = Resource()
+        self.builder.register_instance(Resource, resource)
+        self.builder.register_class(UsesResource)
+        container = self.builder.build()
+        uses_resource = container.resolve(UsesResource)
+
+        # Act
+        container.dispose()
+
+        # Assert
+        self.assertFalse(resource.closed.is_set())
+        self.assertIsNone(uses_resource.resource_open_on_close)
+
+    def test_dispose_context_manager(self):
+        # Arrange
+        self.builder.register_class(Resource, component_scope=dic.scope.SingleInstance)
+
+        # Act
+        with self.builder.build() as container:
+            resource = container.resolve(Resource)
+
+        # Assert
+        self.assertTrue(resource.closed.is_set())
+
+    def test_dispose_timeout_raises_and_continues(self):
+        # Arrange
+        release = threading.Event()
+
+        class Stuck(object):
+            def __init__(self, resource: Resource):
+                self.resource = resource
+
+            def close(self):
+                release.wait()
+
+        self.builder.register_class(Resource, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(Stuck, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        stuck = container.resolve(Stuck)
+
+        # Act
+        with self.assertRaises(dic.container.DisposalError) as cm:
+            container.dispose(timeout=0.1)
+        release.set()
+
+        # Assert
+        self.assertEqual(1, len(cm.exception.errors))
+        self.assertIs(stuck, cm.exception.errors[0][0])
+        self.assertTrue(stuck.resource.closed.is_set())
+
+
+class OverridesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(SimpleComponent, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(Resource, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(UsesResource, component_scope=dic.scope.SingleInstance)
+
+    def test_override_instance(self):
+        # Arrange
+        container = self.builder.build()
+        resource = Resource()
+
+        # Act
+        derived = container.with_overrides({Resource: resource})
+
+        # Assert
+        self.assertIs(resource, derived.resolve(Resource))
+        self.assertIs(resource, derived.resolve(UsesResource).resource)
+        self.assertIsNot(resource, container.resolve(Resource))
+        self.assertIsNot(resource, container.resolve(UsesResource).resource)
+
+    def test_override_shares_unaffected_singletons(self):
+        # Arrange
+        container = self.builder.build()
+        component = container.resolve(SimpleComponent)
+
+        # Act
+        derived = container.with_overrides({Resource: Resource()})
+
+        # Assert
+        self.assertIs(component, derived.resolve(SimpleComponent))
+        self.assertIs(container.resolve(Standalone), derived.resolve(Standalone))
+
+    def test_override_replaces_affected_singletons(self):
+        # Arrange
+        container = self.builder.build()
+        uses_resource = container.resolve(UsesResource)
+
+        # Act
+        derived = container.with_overrides({Resource: Resource()})
+
+        # Assert
+        self.assertIsNot(uses_resource, derived.resolve(UsesResource))
+        self.assertIs(uses_resource, container.resolve(UsesResource))
+        self.assertIs(derived.resolve(UsesResource), derived.resolve(UsesResource))
+
+    def test_override_registration(self):
+        # Arrange
+        container = self.builder.build()
+        registration = dic.container._ConstructorRegistration(SpecialStandalone, dic.scope.SingleInstance())
+
+        # Act
+        derived = container.with_overrides({Standalone: registration})
+
+        # Assert
+        self.assertIsInstance(derived.resolve(SimpleComponent).standalone, SpecialStandalone)
+        self.assertNotIsInstance(container.resolve(SimpleComponent).standalone, SpecialStandalone)
+
+    def test_override_relationships(self):
+        # Arrange
+        self.builder.register_class(LazyResource, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        lazy_resource = container.resolve(LazyResource)
+        resource = Resource()
+
+        # Act
+        derived = container.with_overrides({Resource: resource})
+
+        # Assert
+        self.assertIs(resource, derived.resolve(LazyResource).resource.value)
+        self.assertIs(lazy_resource, container.resolve(LazyResource))
+        self.assertIsNot(resource, lazy_resource.resource.value)
+
+    def test_dispose_derived_keeps_shared_singletons(self):
+        # Arrange
+        container = self.builder.build()
+        resource = container.resolve(Resource)
+        derived = container.with_overrides({Standalone: Standalone()})
+        derived.resolve(Resource)
+
+        # Act
+        derived.dispose()
+
+        # Assert
+        self.assertFalse(resource.closed.is_set())
+
+    def test_derived_cant_be_updated(self):
+        # Arrange
+        container = self.builder.build()
+        derived = container.with_overrides({Standalone: Standalone()})
+        plugin_builder = dic.container.ContainerBuilder()
+        plugin_builder.register_class(User)
+
+        # Act
+        # Assert
+        with self.assertRaises(TypeError):
+            plugin_builder.update(derived)
+
+
+class UpdateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.plugin_builder = dic.container.ContainerBuilder()
+
+    def test_update_adds_registrations(self):
+        # Arrange
+        self.builder.register_class(SimpleComponent)
+        container = self.builder.build()
+        with self.assertRaises(dic.container.DependencyResolutionError):
+            container.resolve(SimpleComponent)
+
+        # Act
+        self.plugin_builder.register_class(Standalone)
+        self.plugin_builder.update(container)
+
+        # Assert
+        self.assertIsInstance(container.resolve(SimpleComponent).standalone, Standalone)
+
+    def test_update_replaces_dependents_only(self):
+        # Arrange
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(SimpleComponent, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(Resource, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(UsesResource, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        component = container.resolve(SimpleComponent)
+        uses_resource = container.resolve(UsesResource)
+
+        # Act
+        self.plugin_builder.register_class(SpecialStandalone, register_as=Standalone)
+        self.plugin_builder.update(container)
+
+        # Assert
+        self.assertIsInstance(container.resolve(SimpleComponent).standalone, SpecialStandalone)
+        self.assertIsNot(component, container.resolve(SimpleComponent))
+        self.assertIs(uses_resource, container.resolve(UsesResource))
+
+    def test_update_replaces_dependents_registered_as_several_types(self):
+        # Arrange
+        class IComponent(object):
+            pass
+
+        class UsesComponent(object):
+            def __init__(self, component: IComponent):
+                self.component = component
+
+        self.builder.register_class(Standalone)
+        self.builder.register_class(
+            SimpleComponent, component_scope=dic.scope.SingleInstance, register_as=[SimpleComponent, IComponent])
+        self.builder.register_class(UsesComponent, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        container.resolve(UsesComponent)
+
+        # Act
+        self.plugin_builder.register_class(SpecialStandalone, register_as=Standalone)
+        self.plugin_builder.update(container)
+
+        # Assert
+        component = container.resolve(SimpleComponent)
+        self.assertIsInstance(component.standalone, SpecialStandalone)
+        self.assertIs(component, container.resolve(IComponent))
+        self.assertIs(component, container.resolve(UsesComponent).component)
+
+    def test_update_doesnt_affect_builder(self):
+        # Arrange
+        self.builder.register_class(Standalone)
+        container = self.builder.build()
+
+        # Act
+        self.plugin_builder.register_class(SpecialStandalone, register_as=Standalone)
+        self.plugin_builder.update(container)
+
+        # Assert
+        self.assertNotIsInstance(self.builder.build().resolve(Standalone), SpecialStandalone)
+
+    def test_update_doesnt_block_or_affect_resolves_in_progress(self):
+        # Arrange
+        started = threading.Event()
+        updated = threading.Event()
+        resolved = []
+
+        def create_component(component_context):
+            started.set()
+            updated.wait(timeout=2)
+            return SimpleComponent(component_context.resolve(Standalone))
+
+        self.builder.register_class(Standalone)
+        self.builder.register_callback(SimpleComponent, create_component)
+        container = self.builder.build()
+        resolving = threading.Thread(target=lambda: resolved.append(container.resolve(SimpleComponent)))
+        resolving.start()
+        started.wait(timeout=2)
+
+        # Act
+        self.plugin_builder.register_class(SpecialStandalone, register_as=Standalone)
+        self.plugin_builder.update(container)
+        updated.set()
+        resolving.join()
+
+        # Assert
+        self.assertNotIsInstance(resolved[0].standalone, SpecialStandalone)
+        self.assertIsInstance(container.resolve(Standalone), SpecialStandalone)
+
+    def test_update_replaces_generics(self):
+        # Arrange
+        self.builder.register_class(Standalone)
+        self.builder.register_generic(Serializer)
+        self.builder.register_generic(SqlRepository, register_as=Repository)
+        container = self.builder.build()
+        container.resolve(Repository[User])
+
+        class CachedSerializer(Serializer[T]):
+            pass
+
+        # Act
+        self.plugin_builder.register_generic(CachedSerializer, register_as=Serializer)
+        self.plugin_builder.update(container)
+
+        # Assert
+        self.assertIsInstance(container.resolve(Repository[User]).serializer, CachedSerializer)
+
+
+class Decorated(object):
+    def __init__(self, inner, name):
+        self.inner = inner
+        self.name = name
+
+
+class DecoratorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+
+    def test_decorators_applied_in_order(self):
+        # Arrange
+        self.builder.register_class(Standalone)
+        self.builder.register_decorator(Standalone, lambda s: Decorated(s, 'cache'))
+        self.builder.register_decorator(Standalone, lambda s: Decorated(s, 'metrics'))
+        container = self.builder.build()
+
+        # Act
+        standalone = container.resolve(Standalone)
+
+        # Assert
+        self.assertEqual('metrics', standalone.name)
+        self.assertEqual('cache', standalone.inner.name)
+        self.assertIsInstance(standalone.inner.inner, Standalone)
+
+    def test_single_instance_decorated_once(self):
+        # Arrange
+        decorated = []
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(SimpleComponent)
+        self.builder.register_decorator(Standalone, lambda s: decorated.append(s) or Decorated(s, 'once'))
+        container = self.builder.build()
+
+        # Act
+        component1 = container.resolve(SimpleComponent)
+        component2 = container.resolve(SimpleComponent)
+
+        # Assert
+        self.assertEqual(1, len(decorated))
+        self.assertIs(component1.standalone, component2.standalone)
+        self.assertEqual('once', component1.standalone.name)
+
+    def test_decorators_apply_to_aliases(self):
+        # Arrange
+        self.builder.register_class(SpecialStandalone, register_as=(Standalone, SpecialStandalone))
+        self.builder.register_decorator(SpecialStandalone, lambda s: Decorated(s, 'special'))
+        container = self.builder.build()
+
+        # Act
+        standalone = container.resolve(Standalone)
+
+        # Assert
+        self.assertEqual('special', standalone.name)
+
+    def test_build_again_decorates_once(self):
+        # Arrange
+        self.builder.register_instance(Standalone, Standalone())
+        self.builder.register_decorator(Standalone, lambda s: Decorated(s, 'instance'))
+        self.builder.build()
+
+        # Act
+        standalone = self.builder.build().resolve(Standalone)
+
+        # Assert
+        self.assertIsInstance(standalone.inner, Standalone)
+        self.assertEqual((), self.builder.registry[Standalone].decorators)
+
+    def test_update_adds_decorators(self):
+        # Arrange
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_decorator(Standalone, lambda s: Decorated(s, 'first'))
+        container = self.builder.build()
+        first = container.resolve(Standalone)
+        plugin_builder = dic.container.ContainerBuilder()
+        plugin_builder.register_decorator(Standalone, lambda s: Decorated(s, 'second'))
+
+        # Act
+        plugin_builder.update(container)
+        second = container.resolve(Standalone)
+
+        # Assert
+        self.assertEqual('first', first.name)
+        self.assertEqual('second', second.name)
+        self.assertEqual('first', second.inner.name)
+
+
+class SpecializeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(SimpleComponent)
+
+    def build(self, threshold):
+        container = self.builder.build()
+        container.specialize_threshold = threshold
+        return container
+
+    def test_hot_type_specialized(self):
+        # Arrange
+        container = self.build(2)
+        standalone = container.resolve(Standalone)
+
+        # Act
+        components = [container.resolve(SimpleComponent) for i in range(3)]
+
+        # Assert
+        self.assertIn(SimpleComponent, container._snapshot.specialized)
+        self.assertEqual(3, len(set(map(id, components))))
+        for component in components:
+            self.assertIs(standalone, component.standalone)
+
+    def test_cold_type_not_specialized(self):
+        # Arrange
+        container = self.build(10)
+
+        # Act
+        container.resolve(SimpleComponent)
+
+        # Assert
+        self.assertEqual({}, container._snapshot.specialized)
+
+    def test_specialized_keeps_decorators_and_scopes(self):
+        # Arrange
+        self.builder.register_class(Standalone, component_scope=dic.scope.Limited(2))
+        self.builder.register_decorator(SimpleComponent, lambda inner: Decorated(inner, 'hot'))
+        container = self.build(1)
+        container.resolve(SimpleComponent)
+
+        # Act
+        component = container.resolve(SimpleComponent)
+
+        # Assert
+        self.assertIn(SimpleComponent, container._snapshot.specialized)
+        self.assertIsInstance(component, Decorated)
+        self.assertIsInstance(component.inner, SimpleComponent)
+        self.assertEqual(2, container.registry_map[Standalone].component_scope.metrics()['created'])
+
+    def test_overriding_arguments_not_specialized(self):
+        # Arrange
+        container = self.build(1)
+        container.resolve(SimpleComponent)
+        standalone = Standalone()
+
+        # Act
+        component = container.resolve(SimpleComponent, s=standalone)
+
+        # Assert
+        self.assertIs(standalone, component.standalone)
+
+    def test_specialized_respects_outer_timeout(self):
+        # Arrange
+        self.builder.register_callback(Standalone, lambda: time.sleep(0.05) or Standalone())
+        container = self.build(1)
+        container.resolve(SimpleComponent)
+        lazy = container.resolve(dic.rel.Lazy(SimpleComponent, timeout=0.01))
+
+        # Act
+        # Assert
+        self.assertIn(SimpleComponent, container._snapshot.specialized)
+        with self.assertRaises(dic.scope.ResolveTimeoutError):
+            lazy.value
+
+    def test_update_forgets_specialized(self):
+        # Arrange
+        container = self.build(1)
+        container.resolve(SimpleComponent)
+        builder = dic.container.ContainerBuilder()
+        builder.register_class(SpecialStandalone, register_as=Standalone)
+
+        # Act
+        builder.update(container)
+
+        # Assert
+        self.assertIsInstance(container.resolve(SimpleComponent).standalone, SpecialStandalone)
+
+
+class InjectTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(SimpleComponent)
+
+    def test_inject_resolves_annotated_parameters(self):
+        # Arrange
+        container = self.builder.build()
+
+        @container.inject
+        def handler(name, component: SimpleComponent, standalone: Standalone):
+            return name, component, standalone
+
+        # Act
+        name, component, standalone = handler('x')
+
+        # Assert
+        self.assertEqual('x', name)
+        self.assertIsInstance(component, SimpleComponent)
+        self.assertIs(standalone, component.standalone)
+
+    def test_inject_leaves_unregistered_defaults(self):
+        # Arrange
+        container = self.builder.build()
+
+        class Handler(object):
+            @container.inject
+            def index(self, component: SimpleComponent, limit: int = 10, standalone: Standalone = None):
+                return component, limit, standalone
+
+        # Act
+        component, limit, standalone = Handler().index()
+
+        # Assert
+        self.assertIsInstance(component, SimpleComponent)
+        self.assertEqual(10, limit)
+        self.assertIs(component.standalone, standalone)
+
+    def test_inject_leaves_passed_arguments(self):
+        # Arrange
+        container = self.builder.build()
+        standalone = Standalone()
+
+        @container.inject
+        def handler(component: SimpleComponent, standalone: Standalone, *, other: Standalone):
+            return component, standalone, other
+
+        # Act
+        positional = handler(None, standalone, other=standalone)
+        keyword = handler(standalone=standalone, other=standalone)
+
+        # Assert
+        self.assertEqual((None, standalone, standalone), positional)
+        self.assertIsInstance(keyword[0], SimpleComponent)
+        self.assertIs(standalone, keyword[1])
+
+    def test_inject_relationships(self):
+        # Arrange
+        container = self.builder.build()
+
+        @container.inject
+        def handler(factory: dic.rel.Factory(SimpleComponent)):
+            return factory()
+
+        # Act
+        component = handler()
+
+        # Assert
+        self.assertIsInstance(component, SimpleComponent)
+
+    def test_inject_async(self):
+        # Arrange
+        container = self.builder.build()
+
+        @container.inject
+        async def handler(component: SimpleComponent):
+            return component
+
+        # Act
+        component = asyncio.run(handler())
+
+        # Assert
+        self.assertIsInstance(component, SimpleComponent)
+        self.assertTrue(asyncio.iscoroutinefunction(handler))
+
+
+class PreforkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+
+    def test_prefork_creates_singletons(self):
+        # Arrange
+        created = []
+        self.builder.register_callback(
+            Standalone, lambda c: created.append(Standalone()) or created[-1], component_scope=dic.scope.SingleInstance)
+        self.builder.register_callback(
+            Resource, lambda c: created.append(Resource()) or created[-1],
+            component_scope=dic.scope.SingleInstancePerProcess)
+        self.builder.register_class(SimpleComponent)
+        container = self.builder.build()
+
+        # Act
+        container.prefork(freeze=False)
+
+        # Assert
+        self.assertEqual(1, len(created))
+        self.assertIs(created[0], container.resolve(Standalone))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires fork")
+    def test_fork_recreates_per_process_singletons(self):
+        # Arrange
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(Resource, component_scope=dic.scope.SingleInstancePerProcess)
+        container = self.builder.build()
+        container.prefork(freeze=False)
+        standalone = container.resolve(Standalone)
+        resource = container.resolve(Resource)
+        read_end, write_end = os.pipe()
+
+        # Act
+        pid = os.fork()
+        if pid == 0:
+            try:
+                same_standalone = container.resolve(Standalone) is standalone
+                same_resource = container.resolve(Resource) is resource
+                os.write(write_end, b'%d%d' % (same_standalone, same_resource))
+            finally:
+                os._exit(0)
+
+        os.close(write_end)
+        os.waitpid(pid, 0)
+        with os.fdopen(read_end, 'rb') as result:
+            child_result = result.read()
+
+        # Assert
+        self.assertEqual(b'10', child_result)
+        self.assertIs(resource, container.resolve(Resource))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires fork")
+    def test_fork_doesnt_dispose_parent_singletons(self):
+        # Arrange
+        self.builder.register_class(Resource, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(UsesResource, component_scope=dic.scope.SingleInstancePerProcess)
+        container = self.builder.build()
+        container.prefork(freeze=False)
+        resource = container.resolve(Resource)
+        read_end, write_end = os.pipe()
+
+        # Act
+        pid = os.fork()
+        if pid == 0:
+            try:
+                uses_resource = container.resolve(UsesResource)
+                container.dispose()
+                os.write(write_end, b'%d%d' % (uses_resource.resource_open_on_close, resource.closed.is_set()))
+            finally:
+                os._exit(0)
+
+        os.close(write_end)
+        os.waitpid(pid, 0)
+        with os.fdopen(read_end, 'rb') as result:
+            child_result = result.read()
+
+        # Assert
+        self.assertEqual(b'10', child_result)
+        self.assertFalse(resource.closed.is_set())
+
+
+class GenericTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.builder.register_class(Standalone)
+        self.builder.register_generic(Serializer)
+
+    def test_resolve_closes_generic(self):
+        # Arrange
+        self.builder.register_generic(SqlRepository, register_as=Repository)
+        container = self.builder.build()
+
+        # Act
+        repository = container.resolve(Repository[User])
+
+        # Assert
+        self.assertIsInstance(repository, SqlRepository)
+        self.assertIsInstance(repository.standalone, Standalone)
+        self.assertEqual(repository.__orig_class__, SqlRepository[User])
+        self.assertEqual(repository.serializer.__orig_class__, Serializer[User])
+
+    def test_resolve_caches_closed_registration(self):
+        # Arrange
+        self.builder.register_generic(SqlRepository, register_as=Repository)
+        container = self.builder.build()
+
+        # Act
+        container.resolve(Repository[User])
+        registration = container.registry_map[Repository[User]]
+        container.resolve(Repository[User])
+
+        # Assert
+        self.assertIs(container.registry_map[Repository[User]], registration)
+        self.assertNotIn(Repository[Order], container.registry_map)
+
+    def test_resolve_single_instance_per_specialization(self):
+        # Arrange
+        self.builder.register_generic(SqlRepository, component_scope=dic.scope.SingleInstance, register_as=Repository)
+        container = self.builder.build()
+
+        # Act
+        user_repository = container.resolve(Repository[User])
+        order_repository = container.resolve(Repository[Order])
+
+        # Assert
+        self.assertIs(user_repository, container.resolve(Repository[User]))
+        self.assertIsNot(user_repository, order_repository)
+
+    def test_concrete_registration_wins(self):
+        # Arrange
+        user_repository = SqlRepository(Standalone(), Serializer())
+        self.builder.register_generic(SqlRepository, register_as=Repository)
+        self.builder.register_instance(Repository[User], user_repository)
+        container = self.builder.build()
+
+        # Act
+        x = container.resolve(Repository[User])
+
+        # Assert
+        self.assertIs(x, user_repository)
+
+    def test_resolve_unregistered_generic_throws(self):
+        # Arrange
+        container = self.builder.build()
+
+        # Act
+        # Assert
+        with self.assertRaises(dic.container.DependencyResolutionError):
+            container.resolve(Repository[User])
+
+    def test_decorators_apply_to_specializations(self):
+        # Arrange
+        self.builder.register_generic(SqlRepository, register_as=Repository)
+        self.builder.register_decorator(Repository, lambda r: Decorated(r, 'cache'))
+        container = self.builder.build()
+
+        # Act
+        user_repository = container.resolve(Repository[User])
+        order_repository = container.resolve(Repository[Order])
+
+        # Assert
+        self.assertEqual('cache', user_repository.name)
+        self.assertEqual(user_repository.inner.__orig_class__, SqlRepository[User])
+        self.assertEqual('cache', order_repository.name)
+        self.assertEqual((), self.builder.generic_registry[Repository].decorators)
+
+    def test_update_decorates_existing_generics(self):
+        # Arrange
+        self.builder.register_generic(SqlRepository, component_scope=dic.scope.SingleInstance, register_as=Repository)
+        container = self.builder.build()
+        first = container.resolve(Repository[User])
+        plugin_builder = dic.container.ContainerBuilder()
+        plugin_builder.register_decorator(Repository, lambda r: Decorated(r, 'metrics'))
+
+        # Act
+        plugin_builder.update(container)
+        second = container.resolve(Repository[User])
+
+        # Assert
+        self.assertIsInstance(first, SqlRepository)
+        self.assertEqual('metrics', second.name)
+        self.assertIsNot(first, second.inner)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+
+class ImportTestCase(unittest.TestCase):
+    def imported(self, statement, modules):
+        """
+        :return: Which of the given modules are imported after running the statement in a new interpreter.
+        """
+        code = '%s\nimport sys\nprint(" ".join(m for m in %r if m in sys.modules))' % (statement, modules)
+        output = subprocess.check_output(
+            [sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=ROOT), universal_newlines=True)
+        return output.split()
+
+    def test_import_dic_imports_no_submodules(self):
+        # Arrange
+        # Act
+        imported = self.imported('import dic', ('dic.container', 'dic.rel', 'dic.scope'))
+
+        # Assert
+        self.assertEqual([], imported)
+
+    def test_submodules_imported_on_use(self):
+        # Arrange
+        # Act
+        imported = self.imported('import dic\ndic.container.ContainerBuilder', ('dic.container', 'dic.plan'))
+
+        # Assert
+        self.assertEqual(['dic.container'], imported)
+
+    def test_build_imports_no_heavy_modules(self):
+        # Arrange
+        statement = '\n'.join([
+            'import dic',
+            'class A(object): pass',
+            'class B(object):',
+            '    def __init__(self, a: A): pass',
+            'builder = dic.container.ContainerBuilder()',
+            'builder.register_class(A)',
+            'builder.register_class(B)',
+            'plan = dic.plan.ContainerPlan.from_container(builder.build())',
+            'plan.build().resolve(B)',
+        ])
+
+        # Act
+        imported = self.imported(
+            statement, ('asyncio', 'concurrent.futures', 'inspect', 'logging', 'tracemalloc', 'typing'))
+
+        # Assert
+        self.assertEqual([], imported)
+
+
+if __name__ == '__main__':
+    unittest.main()
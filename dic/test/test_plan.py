@@ -0,0 +1,121 @@
+import dic
+import pickle
+import threading
+import unittest
+
+
+class Standalone(object):
+    pass
+
+
+class SpecialStandalone(Standalone):
+    pass
+
+
+class SimpleComponent(object):
+    def __init__(self, s: Standalone, lazy_s: dic.rel.Lazy(Standalone)):
+        self.standalone = s
+        self.lazy_standalone = lazy_s
+
+
+class Settings(object):
+    def __init__(self, name):
+        self.name = name
+
+
+def create_settings(component_context):
+    return Settings('from callback')
+
+
+class ContainerPlanTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+
+    def _round_trip(self, container, per_worker_instances=None):
+        plan = dic.plan.ContainerPlan.from_container(container)
+        return pickle.loads(pickle.dumps(plan)).build(per_worker_instances)
+
+    def test_build_resolves_registrations(self):
+        # Arrange
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(SimpleComponent)
+        self.builder.register_callback(Settings, create_settings)
+
+        # Act
+        container = self._round_trip(self.builder.build())
+
+        # Assert
+        component = container.resolve(SimpleComponent)
+        self.assertIsInstance(component, SimpleComponent)
+        self.assertIs(component.standalone, component.lazy_standalone.value)
+        self.assertEqual('from callback', container.resolve(Settings).name)
+
+    def test_build_keeps_configured_scopes(self):
+        # Arrange
+        self.builder.register_class(
+            Standalone, component_scope=dic.scope.Limited(3, dic.scope.SingleInstance, timeout=2))
+
+        # Act
+        container = self._round_trip(self.builder.build())
+
+        # Assert
+        component_scope = container.registry_map[Standalone].component_scope
+        self.assertEqual((3, 2), (component_scope.max_concurrent, component_scope.timeout))
+        self.assertIs(container.resolve(Standalone), container.resolve(Standalone))
+
+    def test_build_keeps_aliases_together(self):
+        # Arrange
+        self.builder.register_class(
+            SpecialStandalone, component_scope=dic.scope.SingleInstance, register_as=(Standalone, 'x'))
+
+        # Act
+        container = self._round_trip(self.builder.build())
+
+        # Assert
+        self.assertIsInstance(container.resolve(Standalone), SpecialStandalone)
+        self.assertIs(container.resolve(Standalone), container.resolve('x'))
+
+    def test_build_copies_instances(self):
+        # Arrange
+        self.builder.register_instance(Settings, Settings('instance'))
+
+        # Act
+        container = self._round_trip(self.builder.build())
+
+        # Assert
+        self.assertEqual('instance', container.resolve(Settings).name)
+
+    def test_build_uses_per_worker_instances(self):
+        # Arrange
+        # locks can't be pickled
+        self.builder.register_instance(Settings, Settings(threading.Lock()), per_worker=True)
+        worker_settings = Settings('worker')
+
+        # Act
+        container = self._round_trip(self.builder.build(), {Settings: worker_settings})
+
+        # Assert
+        self.assertIs(worker_settings, container.resolve(Settings))
+
+    def test_build_requires_per_worker_instances(self):
+        # Arrange
+        self.builder.register_instance(Settings, Settings('instance'), per_worker=True)
+        plan = dic.plan.ContainerPlan.from_container(self.builder.build())
+
+        # Act
+        # Assert
+        with self.assertRaises(dic.plan.PlanError):
+            plan.build()
+
+    def test_lambda_callbacks_cant_be_described(self):
+        # Arrange
+        self.builder.register_callback(Settings, lambda c: Settings('lambda'))
+        container = self.builder.build()
+
+        # Act
+        # Assert
+        with self.assertRaises(dic.plan.PlanError):
+            dic.plan.ContainerPlan.from_container(container)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,7 @@
+import asyncio
 import dic
+import threading
+import time
 import unittest
 
 
@@ -24,6 +27,19 @@ class GuyWhoPutsUpWithLaziness(object):
         self.lazy_part.value.data = data
 
 
+class Lounger(object):
+    def __init__(self, part: dic.rel.Proxy(Part)):
+        self.part = part
+
+    def do_it(self, data):
+        self.part.data = data
+
+
+class Counter(object):
+    def __init__(self, value: dic.rel.Proxy(int)):
+        self.value = value
+
+
 class SuperFactory(object):
     def __init__(self, part_factory: dic.rel.Factory(Part)):
         self.part_factory = part_factory
@@ -53,6 +69,32 @@ class Table(object):
         self.data.append(self.row_factory(name=name, description=description))
 
 
+class Handler(object):
+    pass
+
+
+class CreateHandler(Handler):
+    def __init__(self, part: Part):
+        self.part = part
+
+
+class DeleteHandler(Handler):
+    pass
+
+
+class Dispatcher(object):
+    def __init__(self, handlers: dic.rel.Index(Handler)):
+        self.handlers = handlers
+
+    def dispatch(self, message):
+        return self.handlers[message]()
+
+
+class AsyncPart(object):
+    def __init__(self, part: dic.rel.AsyncLazy(Part)):
+        self.part = part
+
+
 class FactoryTestCase(unittest.TestCase):
     def setUp(self):
         self.builder = dic.container.ContainerBuilder()
@@ -111,6 +153,46 @@ class FactoryTestCase(unittest.TestCase):
         self.assertTrue(guy.lazy_part.has_value)
         self.assertFalse(guy2.lazy_part.has_value)
 
+    def test_factory_timeout(self):
+        # Arrange
+        delays = [0.05, 0]
+
+        def create():
+            time.sleep(delays.pop(0))
+            return Foo()
+
+        self.builder.register_callback(Foo, create)
+        container = self.builder.build()
+        factory = container.resolve(dic.rel.Factory(Foo, timeout=0.01))
+
+        # Act
+        with self.assertRaises(dic.scope.ResolveTimeoutError):
+            factory()
+        foo = factory()
+
+        # Assert
+        self.assertIsInstance(foo, Foo)
+
+    def test_lazy_timeout_tries_again(self):
+        # Arrange
+        delays = [0.05, 0]
+
+        def create():
+            time.sleep(delays.pop(0))
+            return Foo()
+
+        self.builder.register_callback(Foo, create)
+        container = self.builder.build()
+        lazy = container.resolve(dic.rel.Lazy(Foo, timeout=0.01))
+
+        # Act
+        with self.assertRaises(dic.scope.ResolveTimeoutError):
+            lazy.value
+
+        # Assert
+        self.assertFalse(lazy.has_value)
+        self.assertIsInstance(lazy.value, Foo)
+
     def test_factory_can_provide_arguments(self):
         # Arrange
         self.builder.register_class(Row)
@@ -170,5 +252,321 @@ class FactoryTestCase(unittest.TestCase):
         self.assertIsInstance(default_bar.foo, Foo)
         self.assertEqual(special_bar.foo, 42)
 
+
+class ProxyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+
+    def test_proxy_delays_resolve(self):
+        # Arrange
+        created = []
+        self.builder.register_callback(Part, lambda c: created.append(Part()) or created[-1])
+        self.builder.register_class(Lounger)
+        container = self.builder.build()
+
+        # Act
+        container.resolve(Lounger)
+
+        # Assert
+        self.assertEqual([], created)
+
+    def test_proxy_forwards_to_component(self):
+        # Arrange
+        self.builder.register_class(Part)
+        self.builder.register_class(Lounger)
+        container = self.builder.build()
+        lounger = container.resolve(Lounger)
+
+        # Act
+        lounger.do_it("data")
+
+        # Assert
+        self.assertEqual("data", lounger.part.data)
+
+    def test_proxy_resolves_once(self):
+        # Arrange
+        created = []
+        self.builder.register_callback(Part, lambda c: created.append(Part()) or created[-1])
+        self.builder.register_class(Lounger)
+        container = self.builder.build()
+        lounger = container.resolve(Lounger)
+
+        # Act
+        lounger.do_it(1)
+        lounger.do_it(2)
+
+        # Assert
+        self.assertEqual(1, len(created))
+        self.assertEqual(2, created[0].data)
+
+    def test_proxy_isolated(self):
+        # Arrange
+        self.builder.register_class(Part)
+        self.builder.register_class(Lounger)
+        container = self.builder.build()
+        lounger = container.resolve(Lounger)
+        lounger2 = container.resolve(Lounger)
+
+        # Act
+        lounger.do_it("data")
+
+        # Assert
+        self.assertIsNone(lounger2.part.data)
+
+    def test_proxy_compares_as_component(self):
+        # Arrange
+        self.builder.register_class(Part, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(Lounger)
+        container = self.builder.build()
+        part = container.resolve(Part)
+
+        # Act
+        lounger = container.resolve(Lounger)
+
+        # Assert
+        self.assertEqual(part, lounger.part)
+        self.assertTrue(lounger.part == part)
+        self.assertFalse(lounger.part != part)
+        self.assertEqual(hash(part), hash(lounger.part))
+        self.assertIn(lounger.part, {part})
+
+    def test_proxy_is_instance_of_component(self):
+        # Arrange
+        self.builder.register_class(Part)
+        self.builder.register_class(Lounger)
+        container = self.builder.build()
+
+        # Act
+        lounger = container.resolve(Lounger)
+
+        # Assert
+        self.assertIsInstance(lounger.part, Part)
+        self.assertIs(Part, lounger.part.__class__)
+
+    def test_proxy_forwards_ordering(self):
+        # Arrange
+        self.builder.register_callback(int, lambda c: 5)
+        self.builder.register_class(Counter)
+        container = self.builder.build()
+
+        # Act
+        counter = container.resolve(Counter)
+
+        # Assert
+        self.assertTrue(counter.value < 6)
+        self.assertTrue(counter.value <= 5)
+        self.assertTrue(counter.value > 4)
+        self.assertTrue(counter.value >= 5)
+        self.assertEqual(5, counter.value)
+
+
+class AsyncLazyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.builder.register_class(AsyncPart)
+        self.created = []
+
+    async def create_part(self):
+        self.created.append(Part())
+        await asyncio.sleep(0.01)
+        return self.created[-1]
+
+    def test_async_lazy_delays_resolve(self):
+        # Arrange
+        self.builder.register_callback(Part, lambda: self.create_part())
+        container = self.builder.build()
+
+        # Act
+        async_part = container.resolve(AsyncPart)
+
+        # Assert
+        self.assertFalse(async_part.part.has_value)
+        self.assertEqual([], self.created)
+
+    def test_async_lazy_shares_creation(self):
+        # Arrange
+        self.builder.register_callback(Part, lambda: self.create_part())
+        container = self.builder.build()
+        async_part = container.resolve(AsyncPart)
+
+        async def get_parts():
+            return await asyncio.gather(async_part.part.get(), async_part.part.get(), async_part.part.get())
+
+        # Act
+        parts = asyncio.run(get_parts())
+
+        # Assert
+        self.assertEqual(1, len(self.created))
+        self.assertEqual([self.created[0]] * 3, parts)
+        self.assertTrue(async_part.part.has_value)
+
+    def test_async_lazy_retries_failure(self):
+        # Arrange
+        def create_part():
+            if not self.created:
+                self.created.append(None)
+                raise ValueError("Failed")
+            return Part()
+
+        self.builder.register_callback(Part, create_part)
+        container = self.builder.build()
+        async_part = container.resolve(AsyncPart)
+
+        # Act
+        with self.assertRaises(ValueError):
+            asyncio.run(async_part.part.get())
+        part = asyncio.run(async_part.part.get())
+
+        # Assert
+        self.assertIsInstance(part, Part)
+
+    def test_async_lazy_caller_cancelled(self):
+        # Arrange
+        self.builder.register_callback(Part, lambda: self.create_part())
+        container = self.builder.build()
+        async_part = container.resolve(AsyncPart)
+
+        async def cancel_first():
+            first = asyncio.ensure_future(async_part.part.get())
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(async_part.part.get())
+            first.cancel()
+            return await second
+
+        # Act
+        part = asyncio.run(cancel_first())
+
+        # Assert
+        self.assertIs(self.created[0], part)
+        self.assertEqual(1, len(self.created))
+
+    def test_async_lazy_shares_async_singleton(self):
+        # Arrange
+        async def create_part():
+            return await self.create_part()
+
+        self.builder.register_callback(Part, create_part, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        first = container.resolve(dic.rel.AsyncLazy(Part))
+        second = container.resolve(dic.rel.AsyncLazy(Part))
+
+        async def get_parts():
+            return [await first.get(), await second.get(), await container.resolve(Part)]
+
+        # Act
+        parts = asyncio.run(get_parts())
+
+        # Assert
+        self.assertEqual(1, len(self.created))
+        self.assertEqual([self.created[0]] * 3, parts)
+
+    def test_async_lazy_retries_failed_async_singleton(self):
+        # Arrange
+        async def create_part():
+            self.created.append(None)
+            if len(self.created) == 1:
+                raise ValueError("Failed")
+            return Part()
+
+        self.builder.register_callback(Part, create_part, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+
+        # Act
+        with self.assertRaises(ValueError):
+            asyncio.run(container.resolve(dic.rel.AsyncLazy(Part)).get())
+        part = asyncio.run(container.resolve(dic.rel.AsyncLazy(Part)).get())
+
+        # Assert
+        self.assertIsInstance(part, Part)
+        self.assertEqual(2, len(self.created))
+
+    def test_async_lazy_in_thread(self):
+        # Arrange
+        threads = []
+        self.builder.register_callback(Part, lambda: threads.append(threading.current_thread()) or Part())
+        container = self.builder.build()
+        part = container.resolve(dic.rel.AsyncLazy(Part, in_thread=True))
+
+        # Act
+        asyncio.run(part.get())
+
+        # Assert
+        self.assertIsNot(threading.current_thread(), threads[0])
+
+
+class IndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.builder.register_class(Part)
+        self.builder.register_class(CreateHandler, register_as=Handler, key='create')
+        self.builder.register_class(DeleteHandler, register_as=Handler, key='delete',
+                                    component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(Dispatcher)
+
+    def test_index_creates_keyed_components(self):
+        # Arrange
+        container = self.builder.build()
+        dispatcher = container.resolve(Dispatcher)
+
+        # Act
+        created = dispatcher.dispatch('create')
+        deleted = dispatcher.dispatch('delete')
+
+        # Assert
+        self.assertEqual({'create', 'delete'}, set(dispatcher.handlers))
+        self.assertIsInstance(created, CreateHandler)
+        self.assertIsInstance(created.part, Part)
+        self.assertIs(deleted, dispatcher.dispatch('delete'))
+        self.assertIsNot(created, dispatcher.dispatch('create'))
+
+    def test_index_is_read_only(self):
+        # Arrange
+        container = self.builder.build()
+        handlers = container.resolve(dic.rel.Index(Handler))
+
+        # Act
+        # Assert
+        with self.assertRaises(TypeError):
+            handlers['other'] = lambda: Handler()
+
+    def test_index_overriding_arguments(self):
+        # Arrange
+        part = Part()
+        container = self.builder.build()
+        handlers = container.resolve(dic.rel.Index(Handler))
+
+        # Act
+        handler = handlers['create'](part=part)
+
+        # Assert
+        self.assertIs(part, handler.part)
+
+    def test_resolve_keyed_registration(self):
+        # Arrange
+        container = self.builder.build()
+
+        # Act
+        handler = container.resolve((Handler, 'create'))
+
+        # Assert
+        self.assertIsInstance(handler, CreateHandler)
+
+    def test_updated_keyed_registrations(self):
+        # Arrange
+        self.builder.register_class(Dispatcher, component_scope=dic.scope.SingleInstance)
+        container = self.builder.build()
+        dispatcher = container.resolve(Dispatcher)
+        plugin_builder = dic.container.ContainerBuilder()
+        plugin_builder.register_class(DeleteHandler, register_as=Handler, key='update')
+
+        # Act
+        plugin_builder.update(container)
+        updated_dispatcher = container.resolve(Dispatcher)
+
+        # Assert
+        self.assertIsNot(dispatcher, updated_dispatcher)
+        self.assertEqual({'create', 'delete', 'update'}, set(updated_dispatcher.handlers))
+
+
 if __name__ == '__main__':
     unittest.main()
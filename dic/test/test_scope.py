@@ -0,0 +1,172 @@
+import dic
+import threading
+import time
+import unittest
+
+
+class Slow(object):
+    def __init__(self):
+        time.sleep(0.05)
+
+
+class Counter(object):
+    def __init__(self):
+        self.count = 0
+
+
+def total(counters):
+    return sum(counter.count for counter in counters)
+
+
+class LimitedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+
+    def resolve_in_threads(self, container, count):
+        errors = []
+
+        def resolve():
+            try:
+                container.resolve(Slow)
+            except dic.scope.ConcurrencyLimitError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=resolve) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        return errors
+
+    def test_limits_concurrent_creation(self):
+        # Arrange
+        creating = []
+        most_creating = []
+        lock = threading.Lock()
+
+        def create():
+            with lock:
+                creating.append(None)
+                most_creating.append(len(creating))
+            time.sleep(0.02)
+            with lock:
+                creating.pop()
+            return Slow.__new__(Slow)
+
+        self.builder.register_callback(Slow, create, component_scope=dic.scope.Limited(2))
+        container = self.builder.build()
+
+        # Act
+        errors = self.resolve_in_threads(container, 6)
+
+        # Assert
+        self.assertEqual([], errors)
+        self.assertEqual(2, max(most_creating))
+        metrics = container.registry_map[Slow].component_scope.metrics()
+        self.assertEqual(6, metrics['created'])
+        self.assertEqual(0, metrics['waiting'])
+        self.assertGreater(metrics['max_wait_time'], 0)
+
+    def test_rejects_after_timeout(self):
+        # Arrange
+        self.builder.register_class(Slow, component_scope=dic.scope.Limited(1, timeout=0.01))
+        container = self.builder.build()
+
+        # Act
+        errors = self.resolve_in_threads(container, 3)
+
+        # Assert
+        self.assertEqual(2, len(errors))
+        metrics = container.registry_map[Slow].component_scope.metrics()
+        self.assertEqual(1, metrics['created'])
+        self.assertEqual(2, metrics['rejected'])
+
+    def test_wraps_single_instance(self):
+        # Arrange
+        self.builder.register_class(Slow, component_scope=dic.scope.Limited(1, dic.scope.SingleInstance))
+        container = self.builder.build()
+
+        # Act
+        errors = self.resolve_in_threads(container, 3)
+
+        # Assert
+        self.assertEqual([], errors)
+        self.assertIs(container.resolve(Slow), container.resolve(Slow))
+        self.assertEqual(1, container.registry_map[Slow].component_scope.metrics()['created'])
+
+    def test_registrations_get_their_own_limit(self):
+        # Arrange
+        limited = dic.scope.Limited(1)
+        self.builder.register_class(Slow, component_scope=limited)
+        self.builder.register_class(object, component_scope=limited)
+
+        # Act
+        container = self.builder.build()
+
+        # Assert
+        self.assertIsNot(limited, container.registry_map[Slow].component_scope)
+        self.assertIsNot(container.registry_map[Slow].component_scope, container.registry_map[object].component_scope)
+
+
+
+class ShardedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+
+    def test_thread_gets_same_shard(self):
+        # Arrange
+        self.builder.register_class(Counter, component_scope=dic.scope.Sharded(2))
+        container = self.builder.build()
+        resolved = {}
+
+        def resolve(name):
+            resolved[name] = [container.resolve(Counter), container.resolve(Counter)]
+
+        # Act
+        threads = [threading.Thread(target=resolve, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # Assert
+        self.assertIs(resolved[0][0], resolved[0][1])
+        self.assertIs(resolved[1][0], resolved[1][1])
+        self.assertIsNot(resolved[0][0], resolved[1][0])
+
+    def test_round_robin(self):
+        # Arrange
+        self.builder.register_class(Counter, component_scope=dic.scope.Sharded(3, dic.scope.Sharded.ROUND_ROBIN))
+        container = self.builder.build()
+
+        # Act
+        counters = [container.resolve(Counter) for i in range(6)]
+
+        # Assert
+        self.assertEqual(3, len(set(map(id, counters))))
+        self.assertEqual(counters[:3], counters[3:])
+
+    def test_aggregate(self):
+        # Arrange
+        self.builder.register_class(
+            Counter, component_scope=dic.scope.Sharded(3, dic.scope.Sharded.ROUND_ROBIN, aggregate=total))
+        container = self.builder.build()
+        for i in range(5):
+            container.resolve(Counter).count += 1
+
+        # Act
+        count = container.registry_map[Counter].component_scope.aggregate()
+
+        # Assert
+        self.assertEqual(5, count)
+
+    def test_unknown_strategy(self):
+        # Arrange
+        # Act
+        # Assert
+        with self.assertRaises(ValueError):
+            dic.scope.Sharded(2, 'random')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+import dic
+import time
+import typing
+import unittest
+
+
+T = typing.TypeVar('T')
+
+
+class Settings(object):
+    def __init__(self, name='default'):
+        self.name = name
+
+
+class Database(object):
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Cache(object):
+    pass
+
+
+class Pool(object):
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Service(object):
+    def __init__(self, pool: Pool, settings: Settings):
+        self.pool = pool
+        self.settings = settings
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Repository(typing.Generic[T]):
+    pass
+
+
+class Handler(object):
+    pass
+
+
+class DefaultHandler(Handler):
+    pass
+
+
+class TenantHandler(Handler):
+    pass
+
+
+class Dispatcher(object):
+    def __init__(self, handlers: dic.rel.Index(Handler)):
+        self.handlers = handlers
+
+
+class Holder(object):
+    def __init__(self, factory: dic.rel.Factory(Cache)):
+        self.factory = factory
+
+
+class TenantContainersTestCase(unittest.TestCase):
+    def setUp(self):
+        builder = dic.container.ContainerBuilder()
+        builder.register_class(Settings)
+        builder.register_class(Database, component_scope=dic.scope.SingleInstance)
+        builder.register_class(Cache, component_scope=dic.scope.SingleInstance)
+        builder.register_class(Pool, component_scope=dic.scope.SingleInstance)
+        builder.register_class(Service, component_scope=dic.scope.SingleInstance)
+        builder.register_class(DefaultHandler, register_as=Handler, key='a')
+        builder.register_class(Dispatcher, component_scope=dic.scope.SingleInstance)
+        builder.register_class(Holder, component_scope=dic.scope.SingleInstance)
+        self.root = builder.build()
+        self.configured = []
+
+    def configure(self, tenant, builder):
+        self.configured.append(tenant)
+        builder.register_instance(Settings, Settings(tenant))
+
+    def test_tenant_registrations(self):
+        # Arrange
+        tenants = dic.tenant.TenantContainers(self.root, self.configure)
+
+        # Act
+        a = tenants.get('a').resolve(Database)
+        b = tenants.get('b').resolve(Database)
+
+        # Assert
+        self.assertEqual('a', a.settings.name)
+        self.assertEqual('b', b.settings.name)
+        self.assertEqual('default', self.root.resolve(Database).settings.name)
+
+    def test_shares_unaffected_singletons(self):
+        # Arrange
+        tenants = dic.tenant.TenantContainers(self.root, self.configure)
+
+        # Act
+        cache = tenants.get('a').resolve(Cache)
+
+        # Assert
+        self.assertIs(self.root.resolve(Cache), cache)
+        self.assertIs(tenants.get('b').resolve(Cache), cache)
+
+    def test_caches_tenant_containers(self):
+        # Arrange
+        tenants = dic.tenant.TenantContainers(self.root, self.configure)
+
+        # Act
+        first = tenants.get('a')
+        second = tenants.get('a')
+
+        # Assert
+        self.assertIs(first, second)
+        self.assertEqual(['a'], self.configured)
+        stats = tenants.stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(0.5, stats['hit_rate'])
+
+    def test_evicts_least_recently_used(self):
+        # Arrange
+        tenants = dic.tenant.TenantContainers(self.root, self.configure, max_tenants=2)
+        database = tenants.get('a').resolve(Database)
+        tenants.get('b')
+        tenants.get('a')
+
+        # Act
+        tenants.get('c')
+
+        # Assert
+        self.assertIn('a', tenants)
+        self.assertNotIn('b', tenants)
+        self.assertEqual(2, len(tenants))
+        self.assertFalse(database.closed)
+        self.assertEqual(1, tenants.stats()['evictions'])
+
+    def test_evicts_and_disposes_idle_tenants(self):
+        # Arrange
+        tenants = dic.tenant.TenantContainers(self.root, self.configure, idle_timeout=0.01)
+        database = tenants.get('a').resolve(Database)
+        self.assertEqual(1, tenants.stats()['owned_instances'])
+        time.sleep(0.02)
+
+        # Act
+        tenants.evict_idle()
+
+        # Assert
+        self.assertNotIn('a', tenants)
+        self.assertTrue(database.closed)
+        self.assertFalse(self.root.resolve(Database).closed)
+
+    def test_stats_local_creators(self):
+        # Arrange
+        tenants = dic.tenant.TenantContainers(self.root, self.configure)
+        tenant_container = tenants.get('a')
+
+        # Act
+        tenant_container.resolve(Database)
+        tenant_container.resolve(Cache)
+
+        # Assert
+        # Settings and Database are the tenant's own, Cache is shared
+        self.assertEqual(2, tenants.stats()['local_creators'])
+
+    def test_dispose(self):
+        # Arrange
+        tenants = dic.tenant.TenantContainers(self.root, self.configure)
+        database = tenants.get('a').resolve(Database)
+
+        # Act
+        tenants.dispose()
+
+        # Assert
+        self.assertEqual(0, len(tenants))
+        self.assertTrue(database.closed)
+
+
+    def test_evicts_tenant_depending_on_root_singleton(self):
+        # Arrange
+        tenants = dic.tenant.TenantContainers(self.root, self.configure, max_tenants=1)
+        pool = self.root.resolve(Pool)
+        service = tenants.get('a').resolve(Service)
+
+        # Act
+        tenants.get('b')
+
+        # Assert
+        self.assertNotIn('a', tenants)
+        self.assertIs(pool, service.pool)
+        self.assertTrue(service.closed)
+        self.assertFalse(pool.closed)
+
+
+    def test_tenant_generics_rejected(self):
+        # Arrange
+        def configure(tenant, builder):
+            builder.register_generic(Repository)
+
+        tenants = dic.tenant.TenantContainers(self.root, configure)
+
+        # Act
+        # Assert
+        with self.assertRaises(TypeError):
+            tenants.get('a')
+        self.assertNotIn('a', tenants)
+
+
+    def test_tenant_keyed_registrations_isolated(self):
+        # Arrange
+        def configure(tenant, builder):
+            builder.register_class(TenantHandler, register_as=Handler, key='a')
+
+        tenants = dic.tenant.TenantContainers(self.root, configure)
+
+        # Act
+        tenant_dispatcher = tenants.get('t').resolve(Dispatcher)
+        root_dispatcher = self.root.resolve(Dispatcher)
+
+        # Assert
+        self.assertIsNot(root_dispatcher, tenant_dispatcher)
+        self.assertIsInstance(tenant_dispatcher.handlers['a'](), TenantHandler)
+        self.assertIsInstance(root_dispatcher.handlers['a'](), DefaultHandler)
+
+
+    def test_shared_singletons_bound_to_root(self):
+        # Arrange
+        tenants = dic.tenant.TenantContainers(self.root, self.configure)
+        tenant_container = tenants.get('a')
+
+        # Act
+        holder = tenant_container.resolve(Holder)
+        tenants.evict('a')
+
+        # Assert
+        self.assertIs(self.root.resolve(Holder), holder)
+        self.assertIs(self.root, holder.factory._container)
+        self.assertIs(self.root.resolve(Cache), holder.factory())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import dic
+import time
+import tracemalloc
+import unittest
+
+
+class Standalone(object):
+    pass
+
+
+class Slow(object):
+    def __init__(self):
+        time.sleep(0.05)
+
+
+class Large(object):
+    def __init__(self):
+        self.buffer = [0] * 100000
+
+
+class SimpleComponent(object):
+    def __init__(self, s: Standalone, slow: Slow):
+        self.standalone = s
+        self.slow = slow
+
+
+class SlowResolveTracerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.builder.register_class(Standalone, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(Slow)
+        self.builder.register_class(SimpleComponent)
+        self.trees = []
+
+    def test_emits_slow_resolve_tree(self):
+        # Arrange
+        container = self.builder.build()
+        container.tracer = dic.trace.SlowResolveTracer(threshold=0.01, emit=self.trees.append)
+
+        # Act
+        container.resolve(SimpleComponent)
+
+        # Assert
+        self.assertEqual(1, len(self.trees))
+        tree = self.trees[0]
+        self.assertEqual('%s.SimpleComponent' % __name__, tree['type'])
+        self.assertEqual('InstancePerDependency', tree['scope'])
+        self.assertTrue(tree['created'])
+        self.assertGreaterEqual(tree['total_time'], 0.05)
+        self.assertLess(tree['self_time'], tree['total_time'])
+        self.assertEqual(
+            ['%s.Standalone' % __name__, '%s.Slow' % __name__], [child['type'] for child in tree['children']])
+        self.assertGreaterEqual(tree['children'][1]['self_time'], 0.05)
+
+    def test_records_cached_components(self):
+        # Arrange
+        container = self.builder.build()
+        container.resolve(Standalone)
+        container.tracer = dic.trace.SlowResolveTracer(threshold=0, emit=self.trees.append)
+
+        # Act
+        container.resolve(SimpleComponent)
+
+        # Assert
+        standalone = self.trees[0]['children'][0]
+        self.assertEqual('SingleInstance', standalone['scope'])
+        self.assertFalse(standalone['created'])
+
+    def test_fast_resolves_not_emitted(self):
+        # Arrange
+        container = self.builder.build()
+        container.tracer = dic.trace.SlowResolveTracer(threshold=1, emit=self.trees.append)
+
+        # Act
+        container.resolve(Standalone)
+
+        # Assert
+        self.assertEqual([], self.trees)
+
+    def test_sampled_resolves_emitted(self):
+        # Arrange
+        container = self.builder.build()
+        container.tracer = dic.trace.SlowResolveTracer(threshold=1, sample_rate=1, emit=self.trees.append)
+
+        # Act
+        container.resolve(Standalone)
+
+        # Assert
+        self.assertEqual(1, len(self.trees))
+
+    def test_timed_out_resolves_emitted(self):
+        # Arrange
+        timed_out = []
+
+        class Tracer(dic.trace.SlowResolveTracer):
+            def timed_out(self, node):
+                timed_out.append(node.component_type)
+
+        container = self.builder.build()
+        container.tracer = Tracer(threshold=1, emit=self.trees.append)
+
+        # Act
+        with self.assertRaises(dic.scope.ResolveTimeoutError):
+            container.resolve(SimpleComponent, resolve_timeout=0.01)
+
+        # Assert
+        self.assertEqual([Slow], timed_out)
+        self.assertEqual(1, len(self.trees))
+        self.assertTrue(self.trees[0]['timed_out'])
+        self.assertEqual([False, True], [child['timed_out'] for child in self.trees[0]['children']])
+
+
+class MemoryTracerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = dic.container.ContainerBuilder()
+        self.builder.register_class(Standalone)
+        self.builder.register_class(Large, component_scope=dic.scope.SingleInstance)
+        self.builder.register_class(Slow)
+        self.builder.register_class(SimpleComponent)
+        self.container = self.builder.build()
+        self.tracer = dic.trace.MemoryTracer()
+        self.container.tracer = self.tracer
+
+    def tearDown(self):
+        tracemalloc.stop()
+
+    def test_reports_retained_size_per_type(self):
+        # Arrange
+        # Act
+        large = self.container.resolve(Large)
+        report = self.tracer.report()
+
+        # Assert
+        component = report['components'][0]
+        self.assertEqual('%s.Large' % __name__, component['type'])
+        self.assertEqual('SingleInstance', component['scope'])
+        self.assertEqual(1, component['created'])
+        self.assertGreaterEqual(component['total_size'], 800000)
+        self.assertEqual(component['total_size'], component['largest_size'])
+        self.assertEqual({'created': 1, 'total_size': component['total_size']}, report['scopes']['SingleInstance'])
+
+    def test_reports_per_resolve_excluding_existing_singletons(self):
+        # Arrange
+        self.container.resolve(Large)
+        self.tracer.reset()
+
+        # Act
+        self.container.resolve(Large)
+        self.container.resolve(SimpleComponent)
+        self.container.resolve(SimpleComponent)
+        report = self.tracer.report()
+
+        # Assert
+        self.assertEqual(
+            ['%s.%s' % (__name__, name) for name in ('SimpleComponent', 'Slow', 'Standalone')],
+            sorted(component['type'] for component in report['components']))
+        self.assertEqual({'InstancePerDependency'}, set(report['scopes']))
+        resolves = {resolve['type']: resolve for resolve in report['resolves']}
+        self.assertEqual(2, resolves['%s.SimpleComponent' % __name__]['resolves'])
+        self.assertLess(resolves['%s.Large' % __name__]['largest_size'], 800000)
+
+
+if __name__ == '__main__':
+    unittest.main()
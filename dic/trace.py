@@ -0,0 +1,229 @@
+import threading
+import time
+
+
+def _type_name(component_type):
+    if isinstance(component_type, type):
+        return '%s.%s' % (component_type.__module__, component_type.__qualname__)
+    return repr(component_type)
+
+
+class TraceNode(object):
+    """
+    A component resolved as part of a resolve operation, and the components resolved to create it.
+    """
+    def __init__(self, component_type, component_scope):
+        self.component_type = component_type
+        self.component_scope = component_scope
+        # whether the component was newly created, rather than already existing in its scope
+        self.created = False
+        # whether the resolve timed out while resolving the component
+        self.timed_out = False
+        self.start = time.perf_counter()
+        self.total_time = None
+        self.children = []
+
+    @property
+    def self_time(self):
+        """
+        The time spent on this component, excluding the time spent on the components it was created with.
+        """
+        return self.total_time - sum(child.total_time for child in self.children)
+
+    def to_dict(self):
+        """
+        :return: The node (and its children) as structured data, e.g. for logging.
+        """
+        return {
+            'type': _type_name(self.component_type),
+            'scope': type(self.component_scope).__name__,
+            'created': self.created,
+            'timed_out': self.timed_out,
+            'total_time': self.total_time,
+            'self_time': self.self_time,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+class Tracer(object):
+    """
+    Base class for tracing resolves, enabled by setting Container.tracer. Each component resolved becomes a node in
+    the dependency tree of the resolve operation it's part of.
+    """
+    def begin(self, node):
+        """
+        Called when a component starts being resolved.
+        :param node: The node of the component, which has no children yet.
+        """
+        pass
+
+    def end(self, node):
+        """
+        Called when a component has been resolved (or failed to).
+        :param node: The node of the component.
+        """
+        pass
+
+    def timed_out(self, node):
+        """
+        Called when a resolve operation timed out, for the component that was being resolved when it did. The nodes
+        of the components depending on it are marked as timed out too.
+        :param node: The node of the component, before end() is called for it.
+        """
+        pass
+
+    def finish(self, root):
+        """
+        Called when a resolve operation has finished.
+        :param root: The node of the component that was resolved, with the full dependency tree as its children.
+        """
+        pass
+
+
+class SlowResolveTracer(Tracer):
+    """
+    Records the dependency tree of each resolve, and emits the trees of resolves that were slow. Recording is cheap
+    enough to leave on in production.
+    """
+    def __init__(self, threshold=0.1, sample_rate=0.0, emit=None):
+        """
+        :param threshold: The time in seconds a resolve must take for its tree to be emitted. The trees of resolves
+        that timed out are always emitted.
+        :param sample_rate: The fraction of other resolves to emit the trees of anyway, e.g. 0.001.
+        :param emit: The function to emit a tree with (as given by TraceNode.to_dict()), defaults to logging a
+        warning via the 'dic.trace' logger.
+        """
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.emit = emit or _log_tree
+
+    def finish(self, root):
+        if root.total_time >= self.threshold or root.timed_out or (
+                self.sample_rate and _random() < self.sample_rate):
+            self.emit(root.to_dict())
+
+
+def _random():
+    import random
+    return random.random()
+
+
+def _log_tree(tree):
+    import json
+    import logging
+
+    logging.getLogger(__name__).warning(
+        "Resolve of %s took %.3fs: %s", tree['type'], tree['total_time'], json.dumps(tree))
+
+
+class MemoryTracer(Tracer):
+    """
+    Measures the memory retained by each component created, i.e. allocated while creating it and still allocated once
+    it's created, via tracemalloc. Totals are kept per type, per scope and per resolved type, e.g. to find oversized
+    singletons, or per dependency components that are worth sharing.
+    Tracing allocations slows down the whole process, so this is for diagnosing rather than leaving on in production.
+    Allocations made by other threads while a component is being created are counted against it too.
+    """
+    def __init__(self, start=True):
+        """
+        :param start: Whether to start tracemalloc, if it isn't already tracing.
+        """
+        import tracemalloc
+
+        if start and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._get_traced_memory = tracemalloc.get_traced_memory
+        self._lock = threading.Lock()
+        # (type, scope name) -> [instances created, total size, largest size], excluding dependencies
+        self._components = {}
+        # resolved type -> [resolves, total size, largest size], including everything created by the resolve
+        self._resolves = {}
+
+    def begin(self, node):
+        node.memory_start = self._get_traced_memory()[0]
+
+    def end(self, node):
+        node.retained_size = self._get_traced_memory()[0] - node.memory_start
+        if node.created:
+            self._add(self._components, (node.component_type, type(node.component_scope).__name__),
+                      node.retained_size - sum(child.retained_size for child in node.children))
+
+    def finish(self, root):
+        self._add(self._resolves, root.component_type, root.retained_size)
+
+    def _add(self, totals, key, size):
+        with self._lock:
+            total = totals.setdefault(key, [0, 0, 0])
+            total[0] += 1
+            total[1] += size
+            total[2] = max(total[2], size)
+
+    def report(self):
+        """
+        :return: The sizes in bytes as structured data, largest first: 'components' per type, 'scopes' totalled
+        per scope and 'resolves' of everything created per resolve of a type.
+        """
+        with self._lock:
+            components = {key: list(total) for (key, total) in self._components.items()}
+            resolves = {key: list(total) for (key, total) in self._resolves.items()}
+
+        scopes = {}
+        for ((component_type, scope_name), (created, total_size, largest_size)) in components.items():
+            scope_total = scopes.setdefault(scope_name, {'created': 0, 'total_size': 0})
+            scope_total['created'] += created
+            scope_total['total_size'] += total_size
+
+        def ranked(totals, count_name):
+            return sorted((dict(fields, **{
+                count_name: count,
+                'total_size': total_size,
+                'average_size': total_size // count,
+                'largest_size': largest_size,
+            }) for (fields, (count, total_size, largest_size)) in totals), key=lambda t: -t['total_size'])
+
+        return {
+            'components': ranked((({'type': _type_name(component_type), 'scope': scope_name}, total) for
+                                  ((component_type, scope_name), total) in components.items()), 'created'),
+            'scopes': scopes,
+            'resolves': ranked((({'type': _type_name(component_type)}, total) for
+                                (component_type, total) in resolves.items()), 'resolves'),
+        }
+
+    def reset(self):
+        """
+        Clears the totals, e.g. after warming up.
+        """
+        with self._lock:
+            self._components = {}
+            self._resolves = {}
+
+
+class _Trace(object):
+    """
+    Builds the dependency tree of a resolve operation as it happens, passing it to the tracer.
+    """
+    def __init__(self, tracer):
+        self._tracer = tracer
+        # nodes currently being resolved, innermost last
+        self._stack = []
+
+    def begin(self, component_type, component_scope):
+        node = TraceNode(component_type, component_scope)
+        if self._stack:
+            self._stack[-1].children.append(node)
+        self._stack.append(node)
+        self._tracer.begin(node)
+        return node
+
+    def timed_out(self, node):
+        node.timed_out = True
+        # only the innermost component timed out itself, the rest were waiting on it
+        if not any(child.timed_out for child in node.children):
+            self._tracer.timed_out(node)
+
+    def end(self, node):
+        node.total_time = time.perf_counter() - node.start
+        self._stack.pop()
+        self._tracer.end(node)
+        if not self._stack:
+            self._tracer.finish(node)
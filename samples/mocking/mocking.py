@@ -27,14 +27,18 @@ class ServiceTestCase(unittest.TestCase):
     """
     Test case for `Service` that mocks out the database.
     """
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
+        # build the container once, as the application would
         builder = dic.container.ContainerBuilder()
         builder.register_class(Service)
+        builder.register_class(Database)
+        cls.container = builder.build()
 
-        # register a mock instead of the real database
+    def setUp(self):
+        # use a mock instead of the real database, without building the container again
         self.database_mock = unittest.mock.Mock(spec=Database)
-        builder.register_instance(Database, self.database_mock)
-        container = builder.build()
+        container = self.container.with_overrides({Database: self.database_mock})
 
         self.service = container.resolve(Service)
 
@@ -1,4 +1,7 @@
-from distutils.core import setup
+try:
+    from setuptools import setup
+except ImportError:
+    from distutils.core import setup
 import os
 
 with open(os.path.join(os.path.dirname(__file__), 'README.rst')) as readme:
@@ -15,17 +18,19 @@ setup(
     scripts=[],
     url='https://github.com/zsims/dic',
     license='LICENSE.txt',
-    description='Dependency Injection Container for Python 3+. Uses Python 3 annotations to provide hints for the components that should be injected.',
+    description='Dependency Injection Container for Python 3.8+. Uses Python 3 annotations to provide hints for the components that should be injected.',
     long_description=long_description,
     install_requires=[],
+    python_requires='>=3.8',
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
         'Topic :: Software Development :: Libraries :: Application Frameworks',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.2',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
     keywords='development design ioc di',
 )